@@ -0,0 +1,414 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrency import call_in_thread
+from digest_renderer import DigestPart
+from email.message import EmailMessage
+from importlib.util import find_spec
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio, aiohttp, requests
+from metrics import increment, timed
+from pipeline import StreamingPipeline
+from smtp_client import AsyncSMTPSession
+from text_summarizer import (
+    CHUNK_PROMPT, DESCRIPTION_PROMPT, MERGE_PROMPT, PACKED_CHAPTERS_PROMPT,
+    TranscriptSummarizer, format_packed_chapters
+)
+from videos_extractor import YouTubeChannelExtractor
+from transcript_extractor import YouTubeTranscriptExtractor
+from messages_sender import MessageSender
+
+
+class AsyncSummarizer(TranscriptSummarizer):
+    """
+    TranscriptSummarizer whose LLM calls are coroutines on the event loop
+
+    Prompts, routing, the summary cache, the checkpoint and chapter packing
+    are those of TranscriptSummarizer; requests go out through aiohttp and
+    wait for backend slots without holding a thread. Summary cache and video
+    index queries, checkpoint writes and tokenization block, so they run on
+    a pool of ASYNC_BLOCKING_WORKERS threads instead of stalling every
+    request on the loop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._blocking_pool: Optional[ThreadPoolExecutor] = None
+
+    async def _blocking(self, function: Callable, *args):
+        """Run local blocking work (SQLite, checkpoint file, tokenizer) on the blocking pool"""
+        if self._blocking_pool is None:
+            self._blocking_pool = ThreadPoolExecutor(
+                max_workers=max(1, self.config.ASYNC_BLOCKING_WORKERS), thread_name_prefix="async-blocking"
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._blocking_pool, function, *args)
+
+    async def close_async(self) -> None:
+        """Close the backends' async connections and stop the blocking pool"""
+        await self.backends.close_async()
+        if self._blocking_pool is not None:
+            self._blocking_pool.shutdown(wait=True)
+            self._blocking_pool = None
+
+    async def _generate_async(self, template: str, response_format: Optional[str] = None, **fields) -> str:
+        """_generate for the event loop"""
+        prompt, tier, key, cached = await self._blocking(self._prepare_prompt, template, fields)
+        if cached is not None:
+            return cached
+
+        # Retry while the backend asks us to slow down (429/503)
+        async with self.backends.acquire_async(tier) as backend:
+            for attempt in range(self.config.OLLAMA_MAX_RETRIES + 1):
+                await self.rate_limiter.acquire_async()
+                try:
+                    options = {'format': response_format} if response_format else {}
+                    response = await backend.generate_async(
+                        prompt, stream=self.config.OLLAMA_STREAM, on_token=self.on_token, **options
+                    )
+                except aiohttp.ClientResponseError as e:
+                    retry_after = e.headers.get('Retry-After') if e.headers else None
+                    if not self._should_retry(e.status, retry_after, attempt):
+                        raise
+                    continue
+                except requests.HTTPError as e:
+                    # Backends without a native generate_async run generate on a thread
+                    if e.response is None or not self._should_retry(
+                        e.response.status_code, e.response.headers.get('Retry-After'), attempt
+                    ):
+                        raise
+                    continue
+
+                self.rate_limiter.report(200)
+                break
+
+        return await self._blocking(self._response_text, key, backend, response)
+
+    async def summarize_chunk_async(self, text: str) -> str:
+        """summarize_chunk for the event loop"""
+        with timed("summarize.chunk"):
+            try:
+                return await self._generate_async(CHUNK_PROMPT, text=text)
+            except Exception as e:
+                self.logger.error(f"Summarization error: {e}")
+                return ""
+
+    async def _summarize_chunk_checkpointed_async(self, video_id: Optional[str], chunk: str) -> str:
+        """Summarize a chunk unless the checkpoint already has its summary"""
+        if not self.checkpoint or not video_id:
+            return await self.summarize_chunk_async(chunk)
+
+        summary = await self._blocking(self.checkpoint.chunk_summary, video_id, chunk)
+        if summary is None:
+            summary = await self.summarize_chunk_async(chunk)
+            if summary:
+                await self._blocking(self.checkpoint.record_chunk, video_id, chunk, summary)
+        return summary
+
+    async def _summarize_pack_async(self, video_id: Optional[str], chapters: List[Tuple[str, str]]) -> List[str]:
+        """_summarize_pack for the event loop; chapters missing from the answer are summarized concurrently"""
+        with timed("summarize.pack"):
+            try:
+                response = await self._generate_async(
+                    PACKED_CHAPTERS_PROMPT, response_format="json", chapters=format_packed_chapters(chapters)
+                )
+            except Exception as e:
+                self.logger.error(f"Packed summarization error: {e}")
+                response = ""
+
+        summaries = await self._blocking(self._unpack_summaries, video_id, chapters, response)
+        return list(await asyncio.gather(*[
+            _resolved(summary) if summary is not None else self._summarize_chunk_checkpointed_async(video_id, text)
+            for summary, (_, text) in zip(summaries, chapters)
+        ]))
+
+    async def _summarize_group_async(
+        self, video_id: Optional[str], chapter_chunks: List[Tuple[str, List[str]]], group: List[int]
+    ) -> List[str]:
+        """Summaries of a group from _chapter_groups, one per chapter"""
+        if len(group) > 1:
+            chapters = [(chapter_chunks[position][0], chapter_chunks[position][1][0]) for position in group]
+            return await self._summarize_pack_async(video_id, chapters)
+
+        chunks = chapter_chunks[group[0]][1]
+        summaries = await asyncio.gather(*[
+            self._summarize_chunk_checkpointed_async(video_id, chunk) for chunk in chunks
+        ])
+        return [" ".join(summaries)]
+
+    async def summarize_video_description_async(self, transcripts: List[str], video_id: Optional[str] = None) -> str:
+        """summarize_video_description for the event loop"""
+        start, running_summary = 0, ""
+        checkpointed = self.checkpoint is not None and video_id is not None
+        if checkpointed:
+            start, running_summary = await self._blocking(self.checkpoint.description_progress, video_id, transcripts)
+
+        for i in range(start, len(transcripts)):
+            try:
+                running_summary = await self._generate_async(
+                    DESCRIPTION_PROMPT,
+                    running_summary=running_summary,
+                    transcript=transcripts[i]
+                )
+            except Exception as e:
+                self.logger.error(f"Description generation error at chunk {i}: {e}")
+                continue
+
+            if checkpointed and running_summary:
+                await self._blocking(self.checkpoint.record_description, video_id, transcripts[:i + 1], running_summary)
+
+        return running_summary
+
+    async def summarize_video_description_tree_async(self, summaries: List[str]) -> str:
+        """summarize_video_description_tree for the event loop"""
+        level = [summary for summary in summaries if summary]
+        if not level:
+            return ""
+
+        fanout = max(2, self.config.DESCRIPTION_REDUCE_FANOUT)
+        merged_once = False
+
+        while len(level) > 1 or not merged_once:
+            groups = [level[i:i + fanout] for i in range(0, len(level), fanout)]
+            level = list(await asyncio.gather(*map(self._merge_summaries_async, groups)))
+            merged_once = True
+
+            if not all(level):
+                return ""
+
+        return level[0]
+
+    async def _merge_summaries_async(self, summaries: List[str]) -> str:
+        """Merge consecutive summaries into one"""
+        try:
+            return await self._generate_async(MERGE_PROMPT, summaries="\n\n".join(summaries))
+        except Exception as e:
+            self.logger.error(f"Description merge error: {e}")
+            return ""
+
+    async def summarize_video_async(self, video: Dict) -> Dict:
+        """
+        summarize_video for the event loop
+
+        All chapters (or chapter packs) of the video are summarized at once.
+
+        Args:
+            video (Dict): Video data with transcript_data
+
+        Returns:
+            Dict: The same video dict with chapter_summaries and description
+        """
+        chapter_chunks = await self._blocking(self._chapter_chunks, video)
+        if chapter_chunks is None:
+            return video
+
+        video_id = video.get('id')
+        groups = await self._blocking(self._chapter_groups, video_id, chapter_chunks)
+        results = await asyncio.gather(*[
+            self._summarize_group_async(video_id, chapter_chunks, group) for group in groups
+        ])
+
+        # Groups are in video order, so their summaries line up with the chapters
+        chapter_summaries = {}
+        for (chapter, _), summary in zip(chapter_chunks, [summary for result in results for summary in result]):
+            chapter_summaries[chapter] = summary
+
+        if self.config.DESCRIPTION_MODE == "tree":
+            description = await self.summarize_video_description_tree_async([
+                f"{chapter}: {summary}" for chapter, summary in chapter_summaries.items() if summary
+            ])
+        else:
+            description = await self.summarize_video_description_async(
+                [chunk for _, chunks in chapter_chunks for chunk in chunks], video_id
+            )
+
+        return await self._blocking(self._finish_video, video, chapter_summaries, description)
+
+
+async def _resolved(value):
+    """Awaitable of a value already known, to gather it along with pending work"""
+    return value
+
+
+class AsyncPipeline(StreamingPipeline):
+    """
+    Run all stages on one asyncio event loop
+
+    Every channel and video is a coroutine, so a single thread keeps the
+    YouTube, Ollama and SMTP work of all videos in flight at once. yt-dlp
+    is blocking, so channel scans and transcript extraction run on up to
+    ASYNC_YOUTUBE_CONCURRENCY daemon threads; Ollama requests use aiohttp and wait
+    for their backend's slots; the digest goes out over aiosmtplib when it is
+    installed, and over SMTPSession on a worker thread otherwise. Each of
+    those external dependencies has its own concurrency limit.
+    """
+
+    def __init__(
+        self,
+        channel_extractor: Optional[YouTubeChannelExtractor] = None,
+        transcript_extractor: Optional[YouTubeTranscriptExtractor] = None,
+        summarizer: Optional[AsyncSummarizer] = None,
+        sender: Optional[MessageSender] = None
+    ):
+        """Initialize the pipeline with the stage implementations (defaults to the standard ones)"""
+        super().__init__(channel_extractor, transcript_extractor, summarizer or AsyncSummarizer(), sender)
+        self._youtube_slots: Optional[asyncio.Semaphore] = None
+        self._summarize_slots: Optional[asyncio.Semaphore] = None
+
+    async def _youtube(self, function: Callable, item, timeout: Optional[float]):
+        """
+        Run a blocking yt-dlp call in a daemon thread, holding one of the YouTube slots
+
+        Raises asyncio.TimeoutError once the call has run for timeout seconds.
+        Like concurrency.call_with_timeout, the thread is left to finish in the
+        background: its slot is freed for the next call, its result is
+        discarded and it does not keep the process from exiting.
+        """
+        async with self._youtube_slots:
+            future = call_in_thread(function, item, name="async-youtube")
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or None)
+
+    async def _process_channel(self, channel_index: int, channel: str) -> None:
+        """Scan a channel and process all of its videos concurrently"""
+        timeout = self.config.CHANNEL_SCAN_TIMEOUT
+        try:
+            videos = await self._youtube(self.channel_extractor.scan_channel, channel, timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Channel scan timed out after {timeout}s for {channel}")
+            return
+        except Exception as e:
+            self.logger.error(f"Channel scan failed for {channel}: {e}")
+            return
+
+        self.extracted[channel_index] = videos
+        self.transcripts[channel_index] = [None] * len(videos)
+        self.summaries[channel_index] = [None] * len(videos)
+
+        await asyncio.gather(*[
+            self._process_video(channel_index, video_index, video) for video_index, video in enumerate(videos)
+        ])
+
+    async def _process_video(self, channel_index: int, video_index: int, video: Dict) -> None:
+        """Extract a video's transcript and summarize it"""
+        timeout = self.config.TRANSCRIPT_TIMEOUT
+        try:
+            transcript = await self._youtube(self.transcript_extractor.process_video, video, timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Transcript stage timed out after {timeout}s for video {video.get('id')}")
+            return
+        except Exception as e:
+            self.logger.error(f"Transcript stage failed for video {video.get('id')}: {e}")
+            return
+
+        if not transcript:
+            return
+        self.transcripts[channel_index][video_index] = dict(transcript)
+
+        async with self._summarize_slots:
+            try:
+                summary = await self.summarizer.summarize_video_async(transcript)
+            except Exception as e:
+                self.logger.error(f"Summarization stage failed for video {video.get('id')}: {e}")
+                return
+
+        self.summaries[channel_index][video_index] = summary
+
+    async def _send_batch(self, digests: Dict[str, List[DigestPart]]) -> Dict[str, bool]:
+        """
+        Send every recipient their digest emails
+
+        With aiosmtplib, ASYNC_SMTP_CONNECTIONS senders share the messages,
+        each over one logged-in session in "session" EMAIL_DELIVERY_MODE or
+        over a new connection per message in "per_message" mode. Without it,
+        MessageSender.send_batch runs on a worker thread.
+        """
+        if find_spec("aiosmtplib") is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.sender.send_batch, digests)
+
+        messages: asyncio.Queue = asyncio.Queue()
+        for recipient, parts in digests.items():
+            for message in self.sender.build_messages(recipient, parts):
+                messages.put_nowait((recipient, message))
+        delivered = {recipient: True for recipient in digests}
+
+        per_message = self.config.EMAIL_DELIVERY_MODE != "session"
+
+        async def deliver():
+            async with AsyncSMTPSession(rate_limiter=self.sender.rate_limiter) as session:
+                while not messages.empty():
+                    recipient, message = messages.get_nowait()
+                    if per_message:
+                        async with AsyncSMTPSession(rate_limiter=self.sender.rate_limiter) as alone:
+                            sent = await self._send_message(alone, recipient, message)
+                    else:
+                        sent = await self._send_message(session, recipient, message)
+                    if not sent:
+                        delivered[recipient] = False
+
+        await asyncio.gather(*[deliver() for _ in range(max(1, self.config.ASYNC_SMTP_CONNECTIONS))])
+        return delivered
+
+    async def _send_message(self, session: AsyncSMTPSession, recipient: str, message: EmailMessage) -> bool:
+        try:
+            with timed("email.send"):
+                await session.send(message)
+            increment("email.sent")
+            return True
+        except Exception as e:
+            self.logger.error(f"Email sending error for {recipient}: {e}")
+            return False
+
+    async def _send_digest(self, summarized: List[Dict]) -> None:
+        """MessageSender.send_digest with the emails sent from the event loop"""
+        digests, included = self.sender.build_recipient_digests(summarized)
+        if not digests:
+            self.logger.info("No valid channel data found to send an email.")
+            return
+
+        delivered = await self._send_batch(digests)
+        self.sender.record_delivery(summarized, included, delivered)
+        self.logger.info("Message sending process completed")
+
+    async def run_async(self, channels: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Scan, transcribe, summarize and send the digest for all channels
+
+        Args:
+            channels (Optional[List[str]]): Channels to process, read from channels.txt if not provided
+
+        Returns:
+            List[Dict]: Summarized channel data, in the same shape as SUMMARIZED_TRANSCRIPT_FILE
+        """
+        self.channels = channels if channels is not None else (self.channel_extractor.read_channels() or [])
+        self.extracted = [[] for _ in self.channels]
+        self.transcripts = [[] for _ in self.channels]
+        self.summaries = [[] for _ in self.channels]
+
+        self._youtube_slots = asyncio.Semaphore(max(1, self.config.ASYNC_YOUTUBE_CONCURRENCY))
+        self._summarize_slots = asyncio.Semaphore(max(1, self.config.ASYNC_SUMMARIZE_CONCURRENCY))
+
+        try:
+            await asyncio.gather(*[
+                self._process_channel(channel_index, channel) for channel_index, channel in enumerate(self.channels)
+            ])
+        finally:
+            await self.summarizer.close_async()
+
+        summarized = self._channel_data(self.summaries)
+
+        if self.config.STREAM_JSON_SINKS:
+            self._write_stage_file(self.config.EXTRACTED_VIDEOS_FILE, self._channel_data(self.extracted))
+            self._write_stage_file(self.config.VIDEO_TRANSCRIPT_FILE, self._channel_data(self.transcripts))
+            self._write_stage_file(self.config.SUMMARIZED_TRANSCRIPT_FILE, summarized)
+
+        self.summarizer.save_checkpoint()
+        self.summarizer.log_stats()
+        await self._send_digest(summarized)
+        return summarized
+
+    def run(self, channels: Optional[List[str]] = None) -> List[Dict]:
+        """Run the pipeline on a new event loop, see run_async"""
+        return asyncio.run(self.run_async(channels))
+
+
+def AsyncPipelineProcess():
+    """Main entry point for the async pipeline"""
+    pipeline = AsyncPipeline()
+    pipeline.run()
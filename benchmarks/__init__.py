@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the summarizer pipeline.
+
+Run from the repository root, e.g. ``python -m benchmarks.channel_scan``.
+"""
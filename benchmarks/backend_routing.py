@@ -0,0 +1,109 @@
+"""
+Summarization throughput with one backend against prompts routed by size over several.
+
+    python -m benchmarks.backend_routing --videos 8 --instances 1 2 4
+    python -m benchmarks.backend_routing --small-latency 0.05 --large-latency 0.5 --slots 1
+
+Every fake Ollama instance serves --slots requests at once and answers the
+small model faster than the large one. "single" sends every prompt to the
+large model on one instance; "routed" sends prompts of up to --small-max-tokens
+tokens to the small model, with each model on --instances instances.
+Tokenization uses the real tiktoken encoder, so its cl100k_base file must be
+cached locally.
+"""
+import argparse, contextlib, time, config
+from benchmarks.chunking import synthetic_transcript
+from benchmarks.fakes import FakeOllamaServer
+from concurrency import imap_ordered
+
+SMALL_MODEL = "small:latest"
+LARGE_MODEL = "large:latest"
+
+
+def synthetic_videos(count: int, short_chapters: int, long_minutes: float):
+    """Videos with several short chapters and one long one"""
+    return [
+        {
+            'id': f"video{i}",
+            'transcript_data': dict(
+                [(f"Chapter {j}", synthetic_transcript(2 / 60, seed=i * 100 + j)) for j in range(short_chapters)]
+                + [("Main part", synthetic_transcript(long_minutes / 60, seed=i))]
+            )
+        }
+        for i in range(count)
+    ]
+
+
+def backend_specs(setup: str, urls, args):
+    if setup == "single":
+        return [{'name': 'large', 'model': LARGE_MODEL, 'urls': urls[:1], 'max_concurrency': args.slots}]
+
+    half = len(urls) // 2
+    return [
+        {'name': 'small', 'model': SMALL_MODEL, 'urls': urls[:half],
+         'max_tokens': args.small_max_tokens, 'max_concurrency': args.slots},
+        {'name': 'large', 'model': LARGE_MODEL, 'urls': urls[half:], 'max_concurrency': args.slots},
+    ]
+
+
+def run(setup: str, instances: int, args) -> None:
+    from text_summarizer import TranscriptSummarizer
+
+    servers = [
+        FakeOllamaServer(
+            latency=args.large_latency,
+            model_latency={SMALL_MODEL: args.small_latency, LARGE_MODEL: args.large_latency},
+            slots=args.slots
+        )
+        for _ in range(1 if setup == "single" else 2 * instances)
+    ]
+    with contextlib.ExitStack() as stack:
+        for server in servers:
+            stack.enter_context(server)
+        config.SUMMARIZATION_BACKENDS = backend_specs(setup, [server.url for server in servers], args)
+
+        videos = synthetic_videos(args.videos, args.short_chapters, args.long_minutes)
+        summarizer = TranscriptSummarizer()
+
+        start = time.perf_counter()
+        list(imap_ordered(summarizer.summarize_video, videos, max_workers=summarizer.max_in_flight))
+        elapsed = time.perf_counter() - start
+
+    models = {}
+    for server in servers:
+        for model, count in server.models.items():
+            models[model] = models.get(model, 0) + count
+    requests = sum(models.values())
+    label = setup if setup == "single" else f"routed x{instances}"
+    print(
+        f"{label:<14}{elapsed:>9.2f}{requests / elapsed:>12.1f}"
+        f"{models.get(SMALL_MODEL, 0):>9}{models.get(LARGE_MODEL, 0):>9}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--videos', type=int, default=8, help="videos summarized")
+    parser.add_argument('--short-chapters', type=int, default=5, help="two-minute chapters per video")
+    parser.add_argument('--long-minutes', type=float, default=60, help="length of every video's long chapter")
+    parser.add_argument('--small-latency', type=float, default=0.05, help="seconds per small-model request")
+    parser.add_argument('--large-latency', type=float, default=0.3, help="seconds per large-model request")
+    parser.add_argument('--small-max-tokens', type=int, default=2000, help="longest prompt for the small model")
+    parser.add_argument('--slots', type=int, default=1, help="requests each instance serves at once")
+    parser.add_argument('--instances', type=int, nargs='+', default=[1, 2, 4], help="instances per model")
+    args = parser.parse_args()
+
+    config.SKIP_SEEN_VIDEOS = False
+    config.SUMMARY_CACHE_ENABLED = False
+    config.SUMMARY_CHECKPOINT_ENABLED = False
+    config.METRICS_ENABLED = False
+    config.DESCRIPTION_MODE = "tree"
+
+    print(f"{'backends':<14}{'seconds':>9}{'requests/s':>12}{'small':>9}{'large':>9}")
+    run("single", 1, args)
+    for instances in args.instances:
+        run("routed", instances, args)
+
+
+if __name__ == "__main__":
+    main()
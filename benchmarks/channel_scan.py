@@ -0,0 +1,48 @@
+"""
+Channel scan throughput against a fake yt-dlp backend.
+
+    python -m benchmarks.channel_scan --channels 100 --latency 0.2 --workers 1 4 16
+"""
+import argparse, contextlib, io, time, config
+from benchmarks.fakes import fake_ydl_factory
+from videos_extractor import YouTubeChannelExtractor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--channels', type=int, default=100, help="number of fake channels")
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per simulated page fetch")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help="worker counts to compare")
+    parser.add_argument('--max-videos', type=int, default=10, help="MAX_VIDEOS per channel")
+    parser.add_argument('--upload-interval', type=float, default=12.0, help="hours between uploads of a channel")
+    args = parser.parse_args()
+
+    config.MAX_VIDEOS = args.max_videos
+    config.SKIP_SEEN_VIDEOS = False
+    channels = [f"bench{i}" for i in range(args.channels)]
+    extractor = YouTubeChannelExtractor(ydl_factory=fake_ydl_factory(
+        latency=args.latency,
+        videos_per_channel=args.max_videos,
+        upload_interval=args.upload_interval
+    ))
+
+    baseline = None
+    for prefilter in (False, True):
+        config.FLAT_PREFILTER = prefilter
+        for workers in args.workers:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = extractor.extract_channel_videos(channels, max_workers=workers)
+            elapsed = time.perf_counter() - start
+
+            assert [c['channel_name'] for c in result] == channels
+            videos = sum(len(c['videos']) for c in result)
+            baseline = baseline or elapsed
+            print(
+                f"prefilter={str(prefilter):<5} workers={workers:<4} {elapsed:8.2f}s  "
+                f"{len(channels) / elapsed:8.1f} channels/s  videos={videos}  speedup x{baseline / elapsed:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
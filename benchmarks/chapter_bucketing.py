@@ -0,0 +1,70 @@
+"""
+Assigning captions to chapters on a synthetic auto-caption VTT file.
+
+    python -m benchmarks.chapter_bucketing --hours 4 --chapters 60
+"""
+from array import array
+from collections import OrderedDict
+import argparse, os, tempfile, time, webvtt, config
+from benchmarks.fakes import synthetic_chapters, synthetic_vtt
+from transcript_extractor import YouTubeTranscriptExtractor
+
+
+def legacy_bucket(extractor, captions, chapters):
+    """Chapter assignment as it was: every chapter scans and re-parses every caption"""
+    chapter_transcript = {}
+    for i, chapter in enumerate(chapters):
+        start_time = chapter.get('start_time', 0)
+        end_time = chapters[i+1].get('start_time', float('inf')) if i+1 < len(chapters) else float('inf')
+        chapter_captions = [
+            caption.text.replace('\n', ' ').strip()
+            for caption in captions
+            if start_time <= extractor.convert_timestamp(caption.start) < end_time
+        ]
+        unique_captions = list(OrderedDict.fromkeys(filter(bool, chapter_captions)))
+        chapter_transcript[chapter['title']] = ' '.join(unique_captions)
+    return chapter_transcript
+
+
+def single_pass_bucket(extractor, captions, chapters):
+    starts = array('d', (extractor.convert_timestamp(caption.start) for caption in captions))
+    texts = [caption.text.replace('\n', ' ').strip() for caption in captions]
+    return extractor._bucket_by_chapter(starts, texts, chapters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, default=4, help="video length")
+    parser.add_argument('--chapters', type=int, nargs='+', default=[10, 60], help="chapter counts to compare")
+    args = parser.parse_args()
+
+    config.SKIP_SEEN_VIDEOS = False
+    extractor = YouTubeTranscriptExtractor()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.en.vtt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_vtt(args.hours))
+        captions = webvtt.read(path)
+
+    print(f"{args.hours}h video, {len(captions)} captions")
+    for count in args.chapters:
+        chapters = synthetic_chapters(args.hours, count)
+
+        start = time.perf_counter()
+        expected = legacy_bucket(extractor, captions, chapters)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = single_pass_bucket(extractor, captions, chapters)
+        single_pass = time.perf_counter() - start
+
+        assert result == expected
+        print(
+            f"chapters={count:<4} legacy {legacy * 1000:9.1f}ms  "
+            f"single pass {single_pass * 1000:7.1f}ms  (x{legacy / single_pass:.0f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
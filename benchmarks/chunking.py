@@ -0,0 +1,85 @@
+"""
+Transcript chunking: the original per-token loop against the sliced chunker.
+
+    python -m benchmarks.chunking --hours 1 4 8 --max-tokens 30000 3000
+"""
+import argparse, random, re, time, tiktoken, config
+from text_summarizer import TranscriptSummarizer, get_encoder
+
+
+WORDS = ("the model and a video of this we that is to in it for you on with are was "
+         "going really about like just so data people think know right now there").split()
+
+
+def synthetic_transcript(hours: float, words_per_minute: int = 150, seed: int = 0) -> str:
+    """Auto-caption style transcript: lowercase words with occasional sentence breaks"""
+    rng = random.Random(seed)
+    words = []
+    for _ in range(int(hours * 60 * words_per_minute)):
+        words.append(rng.choice(WORDS))
+        if rng.random() < 0.05:
+            words[-1] += '.'
+    return ' '.join(words)
+
+
+def legacy_split_text_into_chunks(text: str, max_tokens: int = 30000):
+    """The chunker as it was before the encoder was shared and boundaries were sliced"""
+    tokenizer = tiktoken.get_encoding("cl100k_base")
+    text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', str(text))
+    tokens = tokenizer.encode(text)
+
+    chunks = []
+    current_chunk_tokens = []
+    current_token_count = 0
+    for token in tokens:
+        if current_token_count >= max_tokens:
+            chunks.append(tokenizer.decode(current_chunk_tokens))
+            current_chunk_tokens = []
+            current_token_count = 0
+        current_chunk_tokens.append(token)
+        current_token_count += 1
+
+    if current_chunk_tokens:
+        chunks.append(tokenizer.decode(current_chunk_tokens))
+    return chunks
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, nargs='+', default=[1, 4, 8], help="transcript lengths")
+    parser.add_argument('--max-tokens', type=int, nargs='+', default=[30000, 3000], help="chunk sizes")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    config.SKIP_SEEN_VIDEOS = False
+    config.SUMMARY_CACHE_ENABLED = False
+    config.CHUNK_OVERLAP_TOKENS = 0
+    config.CHUNK_ALIGN_SENTENCES = False
+    summarizer = TranscriptSummarizer()
+    get_encoder()
+
+    for hours in args.hours:
+        text = synthetic_transcript(hours)
+        for max_tokens in args.max_tokens:
+            assert summarizer.split_text_into_chunks(text, max_tokens) == legacy_split_text_into_chunks(text, max_tokens)
+
+            legacy = best_of(args.repeat, legacy_split_text_into_chunks, text, max_tokens)
+            sliced = best_of(args.repeat, summarizer.split_text_into_chunks, text, max_tokens)
+            aligned = best_of(args.repeat, lambda: list(summarizer.iter_text_chunks(text, max_tokens, align_sentences=True)))
+            print(
+                f"{hours:4.1f}h max_tokens={max_tokens:<6} legacy {legacy * 1000:8.1f}ms  "
+                f"sliced {sliced * 1000:8.1f}ms (x{legacy / sliced:.1f})  sentence-aligned {aligned * 1000:8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
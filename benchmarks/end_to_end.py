@@ -0,0 +1,158 @@
+"""
+Whole pipeline against fake yt-dlp, Ollama and SMTP backends, with per-stage throughput.
+
+    python -m benchmarks.end_to_end --channels 10 --videos 3 --transcript-minutes 30 --chapters 4
+    python -m benchmarks.end_to_end --streaming --ollama-latency 0.5
+    python -m benchmarks.end_to_end --chapters 40 --chapter-packing
+    python -m benchmarks.end_to_end --async --channels 50 --workers 64 --ollama-parallel 200
+    python -m benchmarks.end_to_end --async --recipients 20 --smtp-latency 0.05 --smtp-connections 4
+
+Tokenization uses the real tiktoken encoder, so its cl100k_base file must be
+cached locally (it is after any earlier run of the summarizer).
+"""
+import argparse, contextlib, io, os, tempfile, time, config, metrics
+from benchmarks.fakes import FakeOllamaServer, SMTPSink, fake_ydl_factory
+
+
+def configure(args, directory: str, ollama: FakeOllamaServer, smtp: SMTPSink) -> None:
+    """Point every setting with a side effect at the fakes and a scratch directory"""
+    config.OLLAMA_URL = ollama.url
+    config.EMAIL_SMTP_SERVER = smtp.host
+    config.EMAIL_SMTP_PORT = smtp.port
+    config.EMAIL_USE_TLS = False
+    config.EMAIL_MESSAGES_PER_SECOND = 0
+    config.EMAIL_DELIVERY_MODE = args.email_delivery
+    config.NUMBERS = [f"reader{i}@example.com" for i in range(args.recipients)]
+
+    config.MAX_VIDEOS = args.videos
+    config.SKIP_SEEN_VIDEOS = False
+    config.SUMMARY_CACHE_ENABLED = False
+    config.SUMMARY_CHECKPOINT_ENABLED = False
+    config.METRICS_ENABLED = False
+
+    config.EXTRACTED_VIDEOS_FILE = os.path.join(directory, "extracted_channel_videos.json")
+    config.VIDEO_TRANSCRIPT_FILE = os.path.join(directory, "video_transcripts.json")
+    config.SUMMARIZED_TRANSCRIPT_FILE = os.path.join(directory, "summarized_transcripts.json")
+
+    if args.workers:
+        config.CHANNEL_SCAN_WORKERS = args.workers
+        config.TRANSCRIPT_WORKERS = args.workers
+        config.ASYNC_YOUTUBE_CONCURRENCY = args.workers
+    if args.ollama_parallel:
+        config.SUMMARIZE_MAX_IN_FLIGHT = args.ollama_parallel
+    config.CHAPTER_PACKING = args.chapter_packing
+    config.ASYNC_SMTP_CONNECTIONS = args.smtp_connections
+
+
+def run_batch(channels, ydl_factory):
+    """The stages one after another, as main.py runs them"""
+    from videos_extractor import YouTubeChannelExtractor
+    from transcript_extractor import YouTubeTranscriptExtractor
+    from text_summarizer import TranscriptSummarizer
+    from messages_sender import MessageSender
+
+    with metrics.timed("stage.extract_videos"):
+        extractor = YouTubeChannelExtractor(ydl_factory=ydl_factory)
+        extractor.save_to_json(extractor.iter_channel_videos(channels))
+    with metrics.timed("stage.extract_transcripts"):
+        YouTubeTranscriptExtractor(ydl_factory=ydl_factory).process_input_json()
+    with metrics.timed("stage.summarize"):
+        TranscriptSummarizer().process_channels()
+    with metrics.timed("stage.send"):
+        MessageSender().process_input_json()
+
+
+def run_streaming(channels, ydl_factory):
+    from pipeline import StreamingPipeline
+    from videos_extractor import YouTubeChannelExtractor
+    from transcript_extractor import YouTubeTranscriptExtractor
+
+    with metrics.timed("stage.streaming"):
+        StreamingPipeline(
+            channel_extractor=YouTubeChannelExtractor(ydl_factory=ydl_factory),
+            transcript_extractor=YouTubeTranscriptExtractor(ydl_factory=ydl_factory)
+        ).run(channels)
+
+
+def run_async(channels, ydl_factory):
+    from async_pipeline import AsyncPipeline
+    from videos_extractor import YouTubeChannelExtractor
+    from transcript_extractor import YouTubeTranscriptExtractor
+
+    with metrics.timed("stage.async"):
+        AsyncPipeline(
+            channel_extractor=YouTubeChannelExtractor(ydl_factory=ydl_factory),
+            transcript_extractor=YouTubeTranscriptExtractor(ydl_factory=ydl_factory)
+        ).run(channels)
+
+
+def print_report(report, videos: int, elapsed: float) -> None:
+    print(f"\n{videos} videos in {elapsed:.2f}s  ({videos / elapsed:.2f} videos/s end to end)\n")
+    print(f"{'timer':<28}{'count':>7}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'videos/s':>10}")
+    for name, timing in report['timings'].items():
+        rate = f"{videos / timing['total_seconds']:10.2f}" if name.startswith('stage.') else ' ' * 10
+        print(
+            f"{name:<28}{timing['count']:>7}{timing['total_seconds']:>10.2f}"
+            f"{timing['p50_seconds'] * 1000:>10.1f}{timing['p95_seconds'] * 1000:>10.1f}{rate}"
+        )
+    if report['counters']:
+        print()
+        for name, value in report['counters'].items():
+            print(f"{name:<28}{value:>7g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--channels', type=int, default=5, help="number of fake channels")
+    parser.add_argument('--videos', type=int, default=3, help="recent videos per channel")
+    parser.add_argument('--transcript-minutes', type=float, default=20, help="caption length of every video")
+    parser.add_argument('--chapters', type=int, default=4, help="chapters per video (0 for none)")
+    parser.add_argument('--yt-latency', type=float, default=0.1, help="seconds per fake YouTube fetch")
+    parser.add_argument('--ollama-latency', type=float, default=0.2, help="seconds per fake Ollama request")
+    parser.add_argument('--seconds-per-token', type=float, default=0.0, help="fake Ollama generation speed")
+    parser.add_argument('--smtp-latency', type=float, default=0.0, help="seconds the SMTP sink takes per message")
+    parser.add_argument('--recipients', type=int, default=2, help="digest recipients")
+    parser.add_argument(
+        '--email-delivery', choices=("session", "per_message"), default="session", help="EMAIL_DELIVERY_MODE"
+    )
+    parser.add_argument('--smtp-connections', type=int, default=1, help="ASYNC_SMTP_CONNECTIONS")
+    parser.add_argument('--workers', type=int, default=None, help="channel scan and transcript workers (yt-dlp threads with --async)")
+    parser.add_argument('--ollama-parallel', type=int, default=None, help="SUMMARIZE_MAX_IN_FLIGHT")
+    parser.add_argument('--chapter-packing', action='store_true', help="summarize short chapters together")
+    parser.add_argument('--streaming', action='store_true', help="run the streaming pipeline instead of the stages")
+    parser.add_argument('--async', dest='async_pipeline', action='store_true', help="run the asyncio pipeline")
+    args = parser.parse_args()
+
+    channels = [f"bench{i}" for i in range(args.channels)]
+    ydl_factory = fake_ydl_factory(
+        latency=args.yt_latency,
+        videos_per_channel=args.videos,
+        upload_interval=config.TIME_RANGE / (args.videos + 1),
+        transcript_minutes=args.transcript_minutes,
+        chapters=args.chapters
+    )
+
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeOllamaServer(latency=args.ollama_latency, seconds_per_token=args.seconds_per_token) as ollama, \
+            SMTPSink(latency=args.smtp_latency) as smtp:
+        configure(args, directory, ollama, smtp)
+        metrics.METRICS.reset()
+
+        runner = run_async if args.async_pipeline else run_streaming if args.streaming else run_batch
+        start, cpu_start = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner(channels, ydl_factory)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+        recipients = {recipient for to, _ in smtp.messages for recipient in to}
+        assert len(recipients) == args.recipients, f"expected {args.recipients} recipients, got {len(recipients)}"
+        print_report(metrics.METRICS.report(), args.channels * args.videos, elapsed)
+        print(
+            f"\nOllama requests: {ollama.requests} (peak {ollama.peak_in_flight} at once)  emails: {len(smtp.messages)}"
+            f"  SMTP connections: {smtp.connections}  CPU: {cpu:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Local stand-ins for the external services used by the pipeline."""
+from datetime import datetime, timedelta
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from typing import Dict, List, Optional
+import io, json, random, re, time, threading, pytz
+
+
+WORDS = "we are going to talk about the model data training and results today".split()
+
+# Chapter headings of a packed summarization prompt, answered one JSON key each
+PACKED_CHAPTER = re.compile(r'^\s*### Chapter (\d+):', re.M)
+
+
+def vtt_timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+
+def synthetic_vtt(hours: float, cue_seconds: float = 2.0, seed: int = 0) -> str:
+    """VTT text with one short cue every cue_seconds"""
+    rng = random.Random(seed)
+    lines = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    start = 0.0
+    while start < hours * 3600:
+        end = start + cue_seconds
+        lines.append(f"{vtt_timestamp(start)} --> {vtt_timestamp(end)}")
+        lines.append(' '.join(rng.choice(WORDS) for _ in range(6)))
+        lines.append("")
+        start = end
+    return '\n'.join(lines)
+
+
+def synthetic_rolling_vtt(hours: float, cue_seconds: float = 3.0, seed: int = 0) -> str:
+    """
+    VTT text in the layout of YouTube auto-captions
+
+    Every cue shows the previous line again above a new line with inline
+    word timings, and is followed by a 10 ms cue repeating the new line.
+    """
+    rng = random.Random(seed)
+    lines = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    previous = " "
+    start = 0.0
+    while start < hours * 3600:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 9))]
+        step = cue_seconds / len(words)
+        timed_line = words[0] + ''.join(
+            f"<{vtt_timestamp(start + i * step)}><c> {word}</c>" for i, word in enumerate(words[1:], start=1)
+        )
+        end = start + cue_seconds
+        lines.append(f"{vtt_timestamp(start)} --> {vtt_timestamp(end - 0.01)} align:start position:0%")
+        lines.extend([previous, timed_line, ""])
+        previous = ' '.join(words)
+        lines.append(f"{vtt_timestamp(end - 0.01)} --> {vtt_timestamp(end)} align:start position:0%")
+        lines.extend([previous, " ", ""])
+        start = end
+    return '\n'.join(lines)
+
+
+def synthetic_chapters(hours: float, count: int) -> List[Dict]:
+    if count <= 0:
+        return []
+    length = hours * 3600 / count
+    return [{'title': f"Chapter {i}", 'start_time': i * length} for i in range(count)]
+
+
+class FakeYoutubeDL:
+    """
+    Minimal yt_dlp.YoutubeDL replacement serving canned channel listings and captions
+
+    Channels upload one video every `upload_interval` hours, newest first.
+    Each simulated page fetch sleeps for `latency` seconds: a flat listing
+    costs one fetch, a full listing costs one fetch plus one per entry, and
+    extracting a single video or downloading its captions costs one fetch.
+    Every video has `chapters` chapters and `transcript_minutes` of captions.
+    """
+
+    def __init__(
+        self,
+        params: Optional[Dict] = None,
+        latency: float = 0.2,
+        videos_per_channel: int = 10,
+        upload_interval: float = 1.0,
+        transcript_minutes: float = 10.0,
+        chapters: int = 0
+    ):
+        self.params = params or {}
+        self.latency = latency
+        self.videos_per_channel = videos_per_channel
+        self.upload_interval = upload_interval
+        self.transcript_minutes = transcript_minutes
+        self.chapters = chapters
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def _video(self, channel: str, index: int) -> Dict:
+        # Half an interval back, so the newest video is never later than the caller's "now"
+        uploaded = datetime.now(pytz.utc) - timedelta(hours=(index + 0.5) * self.upload_interval)
+        return {
+            'id': f"{channel}-{index}",
+            'title': f"{channel} video {index}",
+            'timestamp': int(uploaded.timestamp()),
+            'chapters': synthetic_chapters(self.transcript_minutes / 60, self.chapters),
+            'automatic_captions': {'en': [
+                {'ext': 'vtt', 'url': f"https://captions.invalid/{channel}-{index}.vtt"}
+            ]},
+        }
+
+    def urlopen(self, url: str) -> io.BytesIO:
+        """Serve the captions of a video (the same text for every video)"""
+        time.sleep(self.latency)
+        return io.BytesIO(_cached_vtt(self.transcript_minutes).encode('utf-8'))
+
+    def extract_info(self, url: str, download: bool = False) -> Dict:
+        time.sleep(self.latency)
+
+        if 'watch?v=' in url:
+            channel, index = url.split('watch?v=')[-1].rsplit('-', 1)
+            return self._video(channel, int(index))
+
+        channel = url.rstrip('/').removesuffix('/videos').split('/')[-1].lstrip('@')
+        count = min(self.videos_per_channel, self.params.get('playlistend') or self.videos_per_channel)
+        entries = [self._video(channel, i) for i in range(count)]
+
+        if self.params.get('extract_flat'):
+            approximate = self.params.get('extractor_args', {}).get('youtubetab', {}).get('approximate_date')
+            return {'id': channel, 'entries': [
+                {
+                    '_type': 'url',
+                    'id': entry['id'],
+                    'url': f"https://www.youtube.com/watch?v={entry['id']}",
+                    'title': entry['title'],
+                    'timestamp': entry['timestamp'] if approximate else None,
+                }
+                for entry in entries
+            ]}
+
+        time.sleep(self.latency * len(entries))
+        return {'id': channel, 'entries': entries}
+
+
+_vtt_cache: Dict[float, str] = {}
+
+
+def _cached_vtt(minutes: float) -> str:
+    if minutes not in _vtt_cache:
+        _vtt_cache[minutes] = synthetic_vtt(minutes / 60)
+    return _vtt_cache[minutes]
+
+
+def fake_ydl_factory(
+    latency: float = 0.2,
+    videos_per_channel: int = 10,
+    upload_interval: float = 1.0,
+    transcript_minutes: float = 10.0,
+    chapters: int = 0
+):
+    """Return a ydl_factory building FakeYoutubeDL objects with the given behaviour"""
+    def factory(params: Optional[Dict] = None) -> FakeYoutubeDL:
+        return FakeYoutubeDL(
+            params,
+            latency=latency,
+            videos_per_channel=videos_per_channel,
+            upload_interval=upload_interval,
+            transcript_minutes=transcript_minutes,
+            chapters=chapters
+        )
+    return factory
+
+
+class FakeOllamaServer:
+    """
+    Local HTTP server answering Ollama's /api/generate
+
+    Every request takes `latency` seconds (or its model's entry in
+    `model_latency`) plus `seconds_per_token` for each generated token and
+    returns `response_words` words along with Ollama's timing fields.
+    Streaming requests get NDJSON, one line per word. Requests with
+    format "json" get an object with a summary per packed chapter heading,
+    leaving out the last `json_missing` of them. With `slots`, only
+    that many requests are processed at once, like OLLAMA_NUM_PARALLEL; the
+    rest queue. Use as a context manager; `url` is the generate endpoint.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        seconds_per_token: float = 0.0,
+        response_words: int = 40,
+        model_latency: Optional[Dict[str, float]] = None,
+        slots: int = 0,
+        json_missing: int = 0
+    ):
+        self.latency = latency
+        self.seconds_per_token = seconds_per_token
+        self.response_words = response_words
+        self.model_latency = model_latency or {}
+        self.json_missing = json_missing
+        self.requests = 0
+        self.models: Dict[str, int] = {}  # Requests per model
+        self.in_flight = 0
+        self.peak_in_flight = 0  # Most requests handled at the same time
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(slots) if slots else None
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}/api/generate"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                model = body.get('model')
+                with fake._lock:
+                    fake.requests += 1
+                    fake.models[model] = fake.models.get(model, 0) + 1
+                    fake.in_flight += 1
+                    fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+
+                prompt_tokens = len(body.get('prompt', '').split())
+                words = [WORDS[(prompt_tokens + i) % len(WORDS)] for i in range(fake.response_words)]
+                if body.get('format') == 'json':
+                    chapters = PACKED_CHAPTER.findall(body.get('prompt', ''))
+                    answered = chapters[:max(len(chapters) - fake.json_missing, 0)]
+                    words = json.dumps({number: ' '.join(words[:12]) for number in answered}).split(' ')
+                latency = fake.model_latency.get(model, fake.latency)
+                eval_seconds = fake.seconds_per_token * len(words)
+                if fake._slots:
+                    with fake._slots:
+                        time.sleep(latency + eval_seconds)
+                else:
+                    time.sleep(latency + eval_seconds)
+                with fake._lock:
+                    fake.in_flight -= 1
+
+                final = {
+                    'model': model,
+                    'done': True,
+                    'total_duration': int((latency + eval_seconds) * 1e9),
+                    'prompt_eval_count': prompt_tokens,
+                    'prompt_eval_duration': int(latency * 1e9),
+                    'eval_count': len(words),
+                    'eval_duration': int(eval_seconds * 1e9),
+                }
+                if body.get('stream'):
+                    lines = [{'response': word + ' ', 'done': False} for word in words]
+                    lines.append(dict(final, response=''))
+                    payload = ''.join(json.dumps(line) + '\n' for line in lines).encode()
+                    content_type = 'application/x-ndjson'
+                else:
+                    payload = json.dumps(dict(final, response=' '.join(words))).encode()
+                    content_type = 'application/json'
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+class SMTPSink:
+    """
+    In-process SMTP server that accepts everything and keeps the messages
+
+    Speaks just enough ESMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT, DATA,
+    RSET, NOOP, QUIT); there is no STARTTLS, so run with EMAIL_USE_TLS off.
+    With `drop_after` set, every connection is closed without a reply after
+    that many messages, to exercise reconnects. Use as a context manager;
+    `host` and `port` are where it listens.
+    """
+
+    def __init__(self, latency: float = 0.0, drop_after: Optional[int] = None):
+        self.latency = latency
+        self.drop_after = drop_after
+        self.messages: List = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingTCPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address
+
+    def _handler(self):
+        sink = self
+
+        class Handler(StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(line.encode() + b'\r\n')
+
+            def handle(self):
+                with sink._lock:
+                    sink.connections += 1
+                self.reply("220 sink ESMTP")
+                recipients = []
+                accepted = 0
+
+                for raw in self.rfile:
+                    command = raw.decode(errors='replace').strip()
+                    verb = command.split(' ', 1)[0].upper()
+
+                    if verb in ('EHLO', 'HELO'):
+                        self.wfile.write(b"250-sink\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                    elif verb == 'AUTH':
+                        self.reply("235 Authentication successful")
+                    elif verb == 'MAIL':
+                        recipients = []
+                        self.reply("250 OK")
+                    elif verb == 'RCPT':
+                        recipients.append(command.split(':', 1)[-1].strip(' <>'))
+                        self.reply("250 OK")
+                    elif verb == 'DATA':
+                        if sink.drop_after is not None and accepted >= sink.drop_after:
+                            return
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        lines = []
+                        for data_line in self.rfile:
+                            if data_line.rstrip(b'\r\n') == b'.':
+                                break
+                            lines.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                        time.sleep(sink.latency)
+                        with sink._lock:
+                            sink.messages.append((recipients, message_from_bytes(b''.join(lines))))
+                        accepted += 1
+                        self.reply("250 OK queued")
+                    elif verb == 'QUIT':
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        # RSET, NOOP and anything else
+                        self.reply("250 OK")
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
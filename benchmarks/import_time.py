@@ -0,0 +1,64 @@
+"""
+Cold-start import time of every pipeline stage, each measured in a fresh interpreter.
+
+    python -m benchmarks.import_time --repeat 5
+"""
+from statistics import median
+import argparse, os, subprocess, sys
+from main import STAGES
+
+
+def import_seconds(module: str) -> float:
+    """Seconds a new interpreter spends importing module"""
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(module: str, count: int = 3):
+    """Direct imports of module with the largest cumulative import time, from python -X importtime"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+
+    # Lines come in post-order: a module's imports are listed right before it,
+    # one indentation level (two spaces) deeper.
+    children = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative) / 1e6, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                return sorted(children, reverse=True)[:count]
+            children = []
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per stage")
+    args = parser.parse_args()
+
+    # Run the children from the repository root so the stage modules resolve
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    modules = [("entry point", "main"), ("config", "config")]
+    modules += [(name, module) for name, (_, module, _) in STAGES.items()]
+
+    for name, module in modules:
+        seconds = median(import_seconds(module) for _ in range(args.repeat))
+        heaviest = ", ".join(f"{package} {package_seconds * 1000:.0f}ms"
+                             for package_seconds, package in heaviest_imports(module))
+        print(f"{name:<12} {module:<22} {seconds * 1000:8.1f}ms   {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Caption parsing: webvtt-py with exact-duplicate removal against the streaming vtt_parser.
+
+    python -m benchmarks.vtt_parsing --hours 1 4 8
+"""
+from collections import OrderedDict
+import argparse, time, webvtt
+from benchmarks.fakes import synthetic_rolling_vtt
+from transcript_extractor import YouTubeTranscriptExtractor
+from vtt_parser import parse_vtt
+
+
+def webvtt_transcript(extractor, vtt_text: str) -> str:
+    """Transcript as the webvtt path builds it for a video without chapters"""
+    captions = webvtt.from_string(vtt_text)
+    starts = [extractor.convert_timestamp(caption.start) for caption in captions]
+    texts = [caption.text.replace('\n', ' ').strip() for caption in captions]
+    assert len(starts) == len(texts)
+    return ' '.join(OrderedDict.fromkeys(filter(bool, texts)))
+
+
+def fast_transcript(vtt_text: str) -> str:
+    starts, texts = parse_vtt(vtt_text)
+    assert len(starts) == len(texts)
+    return ' '.join(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, nargs='+', default=[1, 4, 8], help="caption lengths to compare")
+    args = parser.parse_args()
+
+    extractor = YouTubeTranscriptExtractor()
+    for hours in args.hours:
+        vtt_text = synthetic_rolling_vtt(hours)
+
+        start = time.perf_counter()
+        legacy = webvtt_transcript(extractor, vtt_text)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = fast_transcript(vtt_text)
+        fast_seconds = time.perf_counter() - start
+
+        print(
+            f"{hours:g}h ({len(vtt_text) / 1e6:.1f} MB)  "
+            f"webvtt {legacy_seconds * 1000:8.1f}ms {len(legacy.split()):>8} words  "
+            f"vtt_parser {fast_seconds * 1000:7.1f}ms {len(fast.split()):>8} words  "
+            f"(x{legacy_seconds / fast_seconds:.1f} faster, x{len(legacy.split()) / len(fast.split()):.1f} less text)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import threading, time, config
+
+
+def _label(index: int, item: Any) -> str:
+    """Short description of a work item for log messages"""
+    if isinstance(item, dict) and item.get('id'):
+        return f"video {item['id']}"
+    return item if isinstance(item, str) else f"item {index}"
+
+
+def run_ordered(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int,
+    timeout: Optional[float] = None,
+    default: Any = None,
+    name: str = "worker",
+) -> List[Any]:
+    """
+    Run func over items on a bounded thread pool and return results in input order
+
+    Args:
+        func (Callable): Function applied to every item
+        items (Iterable): Work items
+        max_workers (int): Maximum number of items processed at once
+        timeout (Optional[float]): Seconds a single item may run before it is abandoned
+        default (Any): Result recorded for items that raise or time out
+        name (str): Thread name prefix, also used in log messages
+
+    Returns:
+        List[Any]: One result per item, in the same order as items
+    """
+    logger = config.LOGGER
+    items = list(items)
+    results = [default] * len(items)
+    started = {}
+    lock = threading.Lock()
+
+    def call(index: int, item: Any) -> Any:
+        with lock:
+            started[index] = time.monotonic()
+        return func(item)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=name)
+    futures = {executor.submit(call, index, item): index for index, item in enumerate(items)}
+    pending = set(futures)
+    poll_interval = min(timeout, 1.0) if timeout else None
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logger.error(f"{name} failed for {_label(index, items[index])}: {e}")
+
+            if not timeout:
+                continue
+
+            # Abandon items that have been running for longer than the timeout.
+            # The thread itself cannot be killed; it finishes in the background
+            # and its result is discarded.
+            now = time.monotonic()
+            with lock:
+                expired = {
+                    future for future in pending
+                    if futures[future] in started and now - started[futures[future]] > timeout
+                }
+            for future in expired:
+                logger.warning(f"{name} timed out after {timeout}s for {_label(futures[future], items[futures[future]])}")
+            pending -= expired
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
+def call_in_thread(func: Callable[[Any], Any], item: Any, name: str = "worker") -> Future:
+    """
+    Start func on item in a daemon thread of its own
+
+    The thread cannot be stopped, but being a daemon it does not keep the
+    process from exiting when its caller gives up on it. Cancelling the
+    returned future has no effect once the thread has started.
+
+    Args:
+        func (Callable): Function applied to the item
+        item (Any): Work item
+        name (str): Thread name
+
+    Returns:
+        Future: Result or exception of the call
+    """
+    future = Future()
+
+    def call() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(item))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=call, name=name, daemon=True).start()
+    return future
+
+
+def call_with_timeout(
+    func: Callable[[Any], Any],
+    item: Any,
+    timeout: Optional[float] = None,
+    default: Any = None,
+    name: str = "worker",
+) -> Any:
+    """
+    Run func on item in a thread of its own and wait at most timeout seconds for it
+
+    For callers that already are workers, e.g. the streaming pipeline's, and
+    need the per-item timeout of run_ordered. A call that times out keeps
+    running in the background and its result is discarded; its exceptions
+    are raised to the caller.
+
+    Args:
+        func (Callable): Function applied to the item
+        item (Any): Work item
+        timeout (Optional[float]): Seconds the call may run, no limit if not set
+        default (Any): Result returned if the call times out
+        name (str): Thread name, also used in log messages
+
+    Returns:
+        Any: The result of func, or default on timeout
+    """
+    future = call_in_thread(func, item, name)
+    try:
+        return future.result(timeout=timeout or None)
+    except FutureTimeoutError:
+        config.LOGGER.warning(f"{name} timed out after {timeout}s for {_label(0, item)}")
+        return default
+
+
+def imap_ordered(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int,
+    timeout: Optional[float] = None,
+    default: Any = None,
+    name: str = "worker",
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Lazily run func over items on a bounded thread pool, yielding results in input order
+
+    Unlike run_ordered, items are pulled from the iterable only as workers free
+    up, so at most a few times max_workers items are held in memory.
+
+    Args:
+        func (Callable): Function applied to every item
+        items (Iterable): Work items, consumed lazily
+        max_workers (int): Maximum number of items processed at once
+        timeout (Optional[float]): Seconds a single item may run before it is abandoned
+        default (Any): Result yielded for items that raise or time out
+        name (str): Thread name prefix, also used in log messages
+
+    Yields:
+        Tuple[Any, Any]: Each item with its result
+    """
+    logger = config.LOGGER
+    max_workers = max(1, max_workers)
+    window = max_workers * 2
+    started = {}
+    lock = threading.Lock()
+
+    def call(index: int, item: Any) -> Any:
+        with lock:
+            started[index] = time.monotonic()
+        return func(item)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+    pending = deque()
+    items = iter(items)
+
+    try:
+        for index, item in enumerate(items):
+            pending.append((index, item, executor.submit(call, index, item)))
+            while len(pending) >= window:
+                yield _ordered_result(pending.popleft(), started, lock, timeout, default, name, logger)
+
+        while pending:
+            yield _ordered_result(pending.popleft(), started, lock, timeout, default, name, logger)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _ordered_result(entry, started, lock, timeout, default, name, logger) -> Tuple[Any, Any]:
+    """Wait for the oldest submitted item of imap_ordered, honouring its timeout"""
+    index, item, future = entry
+    label = _label(index, item)
+
+    while True:
+        if timeout:
+            with lock:
+                began = started.get(index)
+            remaining = timeout - (time.monotonic() - began) if began is not None else timeout
+        else:
+            remaining = None
+
+        try:
+            return item, future.result(timeout=max(remaining, 0) if remaining is not None else None)
+        except FutureTimeoutError:
+            with lock:
+                began = started.get(index)
+            # Not started yet, or started late while queued behind other items: keep waiting
+            if began is None or time.monotonic() - began < timeout:
+                continue
+            logger.warning(f"{name} timed out after {timeout}s for {label}")
+            return item, default
+        except Exception as e:
+            logger.error(f"{name} failed for {label}: {e}")
+            return item, default
@@ -1,35 +1,102 @@
 import os, logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 OUTPUT_DIR: str = "IO_FILES"
 
+# Directory for state kept across runs (not wiped like OUTPUT_DIR)
+STATE_DIR: str = "state"
+
+# Index of the pipeline stages each video has finished
+VIDEO_INDEX_FILE: str = STATE_DIR + "/video_index.sqlite3"
+
+# Skip videos that earlier runs already processed and reuse stored stage results
+SKIP_SEEN_VIDEOS: bool = True
+
 # Time range for video extraction (hours)
 TIME_RANGE: int = 24
 
 # Maximum number of videos to extract per channel
 MAX_VIDEOS: int = 3
 
+# List channels with a flat (cheap) playlist scan first and fully extract only
+# the videos that can fall inside TIME_RANGE
+FLAT_PREFILTER: bool = True
+
+# Extra hours allowed on approximate upload dates from the flat listing.
+# Relative dates ("1 day ago") never overstate a video's age, so this only
+# has to absorb clock skew.
+FLAT_PREFILTER_SLACK: int = 1
+
+# Number of channels scanned concurrently (1 scans channels one at a time)
+CHANNEL_SCAN_WORKERS: int = 8
+
+# Seconds a single channel scan may run before it is abandoned
+CHANNEL_SCAN_TIMEOUT: float = 120
+
+# Socket timeout passed to yt-dlp for channel scans (seconds)
+CHANNEL_SCAN_SOCKET_TIMEOUT: float = 30
+
 # Output directory for saved files
 EXTRACTED_VIDEOS_FILE: str = OUTPUT_DIR + "/extracted_channel_videos.json"
 
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, 'INFO',),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(OUTPUT_DIR+'/youtube_video_extraction.log'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FILE: str = OUTPUT_DIR + '/youtube_video_extraction.log'
+
+
+def setup_logging(log_file: Optional[str] = None) -> None:
+    """
+    Configure logging to the console and LOG_FILE
+
+    Called by the entry points once OUTPUT_DIR exists (importing config has no
+    side effects). Later calls do nothing.
+
+    Args:
+        log_file (Optional[str]): Log file, defaults to LOG_FILE
+    """
+    log_file = log_file or LOG_FILE
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    logging.basicConfig(
+        level=getattr(logging, 'INFO',),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
 
 CHUNK_SIZE:int =  10000
 
+# Tokens repeated at the start of the next transcript chunk
+CHUNK_OVERLAP_TOKENS: int = 0
+
+# End transcript chunks at a sentence break when there is one in their second half
+CHUNK_ALIGN_SENTENCES: bool = False
+
 LOGGER = logging.getLogger(__name__)
 
 SUBTITLE_LANGS: list = ['en', 'en-US', 'en-GB']
 
+# Number of videos whose transcripts are extracted concurrently (1 extracts one at a time)
+TRANSCRIPT_WORKERS: int = 4
+
+# Seconds a single video's transcript extraction may run before it is abandoned
+TRANSCRIPT_TIMEOUT: float = 300
+
+# Socket timeout passed to yt-dlp for video pages and caption downloads (seconds)
+TRANSCRIPT_SOCKET_TIMEOUT: float = 30
+
+# Pass chapters and caption URLs from the channel scan to the transcript stage
+# instead of resolving every video page again
+REUSE_SCAN_METADATA: bool = True
+
+# Caption parser: "fast" (vtt_parser, collapses the rolling repeats of
+# auto-generated captions) or "webvtt" (webvtt-py with exact-duplicate removal)
+VTT_PARSER: str = "fast"
+
 VIDEO_TRANSCRIPT_FILE: str = OUTPUT_DIR + '/video_transcripts.json'
 
 SUMMARIZED_TRANSCRIPT_FILE: str = OUTPUT_DIR + '/summarized_transcripts.json'
@@ -38,11 +105,137 @@ OLLAMA_MODEL: str = "mistral:latest"
 
 OLLAMA_URL: str = "http://localhost:11434/api/generate"
 
-VTT_FILES: str = OUTPUT_DIR + "/vtt_files"
+# Stream Ollama responses as NDJSON instead of waiting for the whole generation
+OLLAMA_STREAM: bool = False
+
+# Seconds to connect to Ollama and to wait for a response (or the next streamed line)
+OLLAMA_CONNECT_TIMEOUT: float = 10
+
+OLLAMA_READ_TIMEOUT: float = 600
+
+# Retries when a connection to Ollama cannot be established
+OLLAMA_CONNECTION_RETRIES: int = 3
+
+# Throttling of Ollama calls: "local" never delays calls, "token_bucket" allows
+# OLLAMA_REQUESTS_PER_SECOND calls with bursts of OLLAMA_BURST (hosted backends).
+# Both back off exponentially on 429/503 responses.
+OLLAMA_RATE_LIMIT: str = "local"
+
+OLLAMA_REQUESTS_PER_SECOND: float = 0.5
+
+OLLAMA_BURST: int = 1
+
+# Back-off after 429/503 responses (seconds)
+OLLAMA_BACKOFF_INITIAL: float = 2.0
+
+OLLAMA_BACKOFF_MAX: float = 60.0
+
+# Retries of a call rejected with 429/503
+OLLAMA_MAX_RETRIES: int = 3
+
+# Maximum number of Ollama requests in flight at once. Set it to Ollama's
+# OLLAMA_NUM_PARALLEL to keep every slot busy; 1 summarizes serially.
+SUMMARIZE_MAX_IN_FLIGHT: int = 1
+
+# Summarization backends, each running one model on one or more Ollama
+# instances. Every prompt goes to the backend with the smallest max_tokens
+# that fits it (leave max_tokens out for no limit); listing several urls
+# spreads that backend's requests over all of them, max_concurrency requests
+# per instance. Empty runs everything on OLLAMA_MODEL at OLLAMA_URL with
+# SUMMARIZE_MAX_IN_FLIGHT requests at once. For example:
+#   [{"name": "small", "model": "llama3.2:3b", "max_tokens": 4000, "max_concurrency": 2,
+#     "urls": ["http://localhost:11434/api/generate", "http://localhost:11435/api/generate"]},
+#    {"name": "large", "model": "mistral:latest", "urls": [OLLAMA_URL]}]
+SUMMARIZATION_BACKENDS: List[Dict] = []
+
+# Summarize runs of adjacent short chapters in one request, answered as JSON
+# keyed by chapter; chapters missing from the answer are summarized on their own
+CHAPTER_PACKING: bool = False
+
+# Most transcript tokens and chapters packed into one request
+CHAPTER_PACK_MAX_TOKENS: int = 4000
+
+CHAPTER_PACK_MAX_CHAPTERS: int = 10
+
+# How the overall video description is built: "running" feeds every raw
+# transcript chunk through Ollama in sequence; "tree" merges the chapter
+# summaries in parallel rounds of DESCRIPTION_REDUCE_FANOUT
+DESCRIPTION_MODE: str = "running"
+
+DESCRIPTION_REDUCE_FANOUT: int = 4
+
+# Reuse Ollama responses for prompts that were already answered
+SUMMARY_CACHE_ENABLED: bool = True
+
+SUMMARY_CACHE_FILE: str = STATE_DIR + "/summary_cache.sqlite3"
+
+# Least recently used responses are evicted beyond this many entries
+SUMMARY_CACHE_MAX_ENTRIES: int = 5000
+
+# Save finished chunk summaries and description progress while summarizing,
+# so `python main.py --resume` can continue a crashed run
+SUMMARY_CHECKPOINT_ENABLED: bool = True
+
+SUMMARY_CHECKPOINT_FILE: str = OUTPUT_DIR + "/summary_checkpoint.json"
+
+# Minimum seconds between checkpoint writes
+SUMMARY_CHECKPOINT_INTERVAL: float = 30.0
+
+# Write timings and counters of the run (stages, yt-dlp, Ollama, SMTP) as JSON
+METRICS_ENABLED: bool = True
+
+METRICS_REPORT_FILE: str = OUTPUT_DIR + "/metrics.json"
+
+# Also write the metrics in Prometheus text format to this file, e.g. for the
+# node_exporter textfile collector (None to skip)
+METRICS_PROMETHEUS_FILE: Optional[str] = None
+
+# Format of the intermediate stage files: "json" writes each file in one go
+# at the end of its stage; "jsonl" appends one video per line as soon as it is
+# done (files get a .jsonl suffix)
+INTERMEDIATE_FORMAT: str = "json"
+
+# Capacity of the queues between stages of the streaming pipeline (main.py --streaming)
+STREAM_QUEUE_SIZE: int = 16
+
+# Also write the intermediate JSON files when running the streaming pipeline
+STREAM_JSON_SINKS: bool = True
+
+# Concurrency limits of the async pipeline (main.py --async), per external
+# dependency. Ollama requests are bounded per backend (max_concurrency in
+# SUMMARIZATION_BACKENDS, or SUMMARIZE_MAX_IN_FLIGHT).
+# yt-dlp calls in flight, each on a thread of its own
+ASYNC_YOUTUBE_CONCURRENCY: int = 16
+
+# Videos being summarized at once
+ASYNC_SUMMARIZE_CONCURRENCY: int = 64
+
+# Threads for the summarizer's local blocking work: summary cache and video
+# index queries, checkpoint writes and tokenization
+ASYNC_BLOCKING_WORKERS: int = 8
+
+# Emails of the digest sent at once: logged-in connections in "session"
+# EMAIL_DELIVERY_MODE, one new connection per email in "per_message" mode.
+# Without aiosmtplib installed, MessageSender sends them on a worker thread.
+ASYNC_SMTP_CONNECTIONS: int = 1
 
 
 EMAIL_SENDER = "athishsivakumaran@gmail.com"
 EMAIL_PASSWORD = "adfv yhlf jnik ntfw"
 EMAIL_SMTP_SERVER = "smtp.gmail.com"
 EMAIL_SMTP_PORT = 587
+EMAIL_USE_TLS = True  # STARTTLS before logging in
+EMAIL_SMTP_TIMEOUT = 30  # Seconds for SMTP socket operations
+# "session" sends every email over one logged-in connection, "per_message"
+# connects and logs in again for each recipient
+EMAIL_DELIVERY_MODE = "session"
+EMAIL_MESSAGES_PER_SECOND = 1.0  # Sending rate (0 for no limit)
+EMAIL_BURST = 5  # Emails that may go out back to back before the rate applies
+EMAIL_RECONNECT_ATTEMPTS = 2  # Reconnects per email when the server drops the connection
+# Digests with more HTML than this are split into several emails (Gmail clips
+# messages beyond about 102 KB); 0 for no limit
+EMAIL_MAX_HTML_BYTES = 100_000
 NUMBERS = ["athishsivakumaran@gmail.com", "71762133006@cit.edu.in"]  # Email addresses
+# Channels (as in channels.txt) each recipient receives; recipients of NUMBERS
+# without an entry get every channel, e.g. {"someone@example.com": ["@channelname1"]}
+SUBSCRIPTIONS: Dict[str, List[str]] = {}
@@ -0,0 +1,159 @@
+from html import escape
+from string import Template
+from typing import Callable, Dict, List, NamedTuple, Optional
+import config
+
+
+# Templates are parsed once at import; every value substituted into the HTML
+# ones is escaped first.
+VIDEO_HTML = Template("""
+                <div style="margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px solid #e0e0e0;">
+                  <h2 style="color: #333;">Channel: $channel_name</h2>
+                  <h3 style="color: #555;">Title: $title</h3>
+                  <p style="margin: 5px 0;"><strong>Upload Time:</strong> $upload_time</p>
+                  <p style="margin: 5px 0;"><strong>Description:</strong> $description</p>
+                  <h3 style="color: #333; margin-top: 20px;">Chapter Summaries</h3>
+                  $chapter_summaries
+                </div>
+                """)
+
+CHAPTER_HTML = Template("<p style='margin: 0 0 10px 0;'><strong>$chapter:</strong> $summary</p>")
+
+NO_CHAPTERS_HTML = "<p>No chapter summaries available</p>"
+
+DOCUMENT_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="UTF-8">
+  <title>Channel Video Summary</title>
+</head>
+<body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px; margin: 0;">
+  <div style="max-width: 700px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 8px; box-shadow: 0 0 15px rgba(0, 0, 0, 0.1);">
+    """
+
+DOCUMENT_FOOT = """
+    <p style="text-align: center; color: #888; font-size: 0.9em;">&copy; 2025 Your Company Name</p>
+  </div>
+</body>
+</html>"""
+
+VIDEO_TEXT = Template("""Channel: $channel_name
+Title: $title
+Upload Time: $upload_time
+Description: $description
+
+Chapter Summaries
+$chapter_summaries
+""")
+
+TEXT_SEPARATOR = "\n" + "-" * 60 + "\n\n"
+
+DOCUMENT_OVERHEAD = len((DOCUMENT_HEAD + DOCUMENT_FOOT).encode('utf-8'))
+
+
+class RenderedVideo(NamedTuple):
+    """One video of the digest in both formats"""
+    html: str
+    text: str
+    size: int  # UTF-8 bytes of html
+
+
+class DigestPart(NamedTuple):
+    """One email of a digest"""
+    html: str
+    text: str
+
+
+class DigestRenderer:
+    """
+    Renders summarized videos into digest emails
+
+    Videos are rendered once into HTML and plain-text blocks; documents are
+    joined from a list of those blocks. Digests whose HTML would exceed
+    EMAIL_MAX_HTML_BYTES are split between videos into several parts.
+    """
+
+    def __init__(self, format_time: Callable[[str], str] = str, max_html_bytes: Optional[int] = None):
+        """
+        Args:
+            format_time (Callable[[str], str]): Turns a video's ISO upload_time into display text
+            max_html_bytes (Optional[int]): HTML size limit per email, defaults to
+                config.EMAIL_MAX_HTML_BYTES (0 or None for no limit)
+        """
+        self.format_time = format_time
+        self.max_html_bytes = config.EMAIL_MAX_HTML_BYTES if max_html_bytes is None else max_html_bytes
+
+    def render_video(self, channel_name: str, video: Dict) -> RenderedVideo:
+        """Render one video in HTML and plain text"""
+        title = video.get('title', 'No title available')
+        upload_time = self.format_time(video.get('upload_time', ''))
+        description = video.get('description', 'No description available')
+        chapters = video.get('chapter_summaries') or {}
+
+        if chapters:
+            chapter_html = ''.join([
+                CHAPTER_HTML.substitute(chapter=escape(str(chapter)), summary=escape(str(summary)))
+                for chapter, summary in chapters.items()
+            ])
+            chapter_text = '\n'.join([f"- {chapter}: {summary}" for chapter, summary in chapters.items()])
+        else:
+            chapter_html = NO_CHAPTERS_HTML
+            chapter_text = "No chapter summaries available"
+
+        html = VIDEO_HTML.substitute(
+            channel_name=escape(str(channel_name)),
+            title=escape(str(title)),
+            upload_time=escape(str(upload_time)),
+            description=escape(str(description)),
+            chapter_summaries=chapter_html
+        )
+        text = VIDEO_TEXT.substitute(
+            channel_name=channel_name,
+            title=title,
+            upload_time=upload_time,
+            description=description,
+            chapter_summaries=chapter_text
+        )
+        return RenderedVideo(html, text, len(html.encode('utf-8')))
+
+    def render_channel(self, channel: Dict) -> List[RenderedVideo]:
+        """Render every video of a channel, in order"""
+        channel_name = channel.get('channel_name', 'Unknown Channel')
+        return [self.render_video(channel_name, video) for video in channel.get('videos', []) if video]
+
+    def document(self, videos: List[RenderedVideo]) -> DigestPart:
+        """Wrap rendered videos into one complete email"""
+        html = [DOCUMENT_HEAD]
+        html.extend(video.html for video in videos)
+        html.append(DOCUMENT_FOOT)
+        return DigestPart(''.join(html), TEXT_SEPARATOR.join(video.text for video in videos))
+
+    def parts(self, videos: List[RenderedVideo]) -> List[DigestPart]:
+        """
+        Split rendered videos into as few emails as the size limit allows
+
+        A single video larger than the limit still gets an email of its own.
+
+        Args:
+            videos (List[RenderedVideo]): Videos in digest order
+
+        Returns:
+            List[DigestPart]: The emails, empty if there are no videos
+        """
+        if not videos:
+            return []
+        if not self.max_html_bytes:
+            return [self.document(videos)]
+
+        parts = []
+        current: List[RenderedVideo] = []
+        size = DOCUMENT_OVERHEAD
+        for video in videos:
+            if current and size + video.size > self.max_html_bytes:
+                parts.append(self.document(current))
+                current, size = [], DOCUMENT_OVERHEAD
+            current.append(video)
+            size += video.size
+
+        parts.append(self.document(current))
+        return parts
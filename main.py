@@ -1,9 +1,23 @@
+from functools import partial
+from importlib import import_module
 from tqdm import tqdm
-import os, shutil, config
-from text_summarizer import TranscriptSummarizerProcess
-from videos_extractor import VideoExtractor 
-from messages_sender import MessageSenderProcess
-from transcript_extractor import TranscriptExtractor 
+import argparse, os, shutil, config, metrics
+
+
+# Stage name -> (description, module, entry point). Stage modules are imported
+# only when their stage runs, so a single-stage run does not load the
+# dependencies (yt-dlp, tiktoken, ...) of the others.
+STAGES = {
+    "extract": ("Extracting videos", "videos_extractor", "VideoExtractor"),
+    "transcripts": ("Extracting transcripts", "transcript_extractor", "TranscriptExtractor"),
+    "summarize": ("Summarizing transcripts", "text_summarizer", "TranscriptSummarizerProcess"),
+    "send": ("Sending messages", "messages_sender", "MessageSenderProcess"),
+    "streaming": ("Running streaming pipeline", "pipeline", "StreamingPipelineProcess"),
+    "async": ("Running async pipeline", "async_pipeline", "AsyncPipelineProcess"),
+}
+
+# Stages that run the whole pipeline at once rather than a single step
+PIPELINES = ("streaming", "async")
 
 
 def setup_output_directory():
@@ -11,21 +25,69 @@ def setup_output_directory():
         shutil.rmtree(config.OUTPUT_DIR)
     os.makedirs(config.OUTPUT_DIR, exist_ok=True)
 
+    # The log file lives in OUTPUT_DIR, so it is opened after the wipe
+    config.setup_logging()
+
+
+def run_stage(name: str) -> None:
+    """Import a stage's module and run its entry point"""
+    _, module, function = STAGES[name]
+    getattr(import_module(module), function)()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize recent YouTube videos and email the digest")
+    parser.add_argument(
+        '--streaming', action='store_true',
+        help="run all stages at once, streaming videos between them instead of stage by stage"
+    )
+    parser.add_argument(
+        '--async', dest='async_pipeline', action='store_true',
+        help="run all stages at once on a single asyncio event loop"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="continue an interrupted batch run from its transcripts and summary checkpoint"
+    )
+    parser.add_argument(
+        '--stage', choices=[name for name in STAGES if name not in PIPELINES],
+        help="run only this stage on the files the previous stage left in the output directory"
+    )
+    return parser.parse_args()
+
 
 def main():
-    steps = [
-        ("Setting up output directory",setup_output_directory),
-        ("Extracting videos", VideoExtractor),
-        ("Extracting transcripts", TranscriptExtractor),
-        ("Summarizing transcripts", TranscriptSummarizerProcess),
-        ("Sending messages", MessageSenderProcess)
-    ]
-    
-    with tqdm(total=len(steps), desc="Overall Progress", unit="step") as progress_bar:
-        for step_description, step_function in steps:
-            tqdm.write(f"Starting: {step_description}")
-            step_function()
-            progress_bar.update(1)
+    args = parse_args()
+
+    if args.stage:
+        # Keep OUTPUT_DIR: the stage reads the previous stage's output from it
+        stages = [args.stage]
+    elif args.resume:
+        # Keep OUTPUT_DIR: it holds the transcripts and the summary checkpoint
+        stages = ["summarize", "send"]
+    elif args.async_pipeline:
+        stages = ["async"]
+    elif args.streaming:
+        stages = ["streaming"]
+    else:
+        stages = ["extract", "transcripts", "summarize", "send"]
+
+    steps = [(STAGES[name][0], partial(run_stage, name), name) for name in stages]
+    if args.stage or args.resume:
+        config.setup_logging()
+    else:
+        steps.insert(0, ("Setting up output directory", setup_output_directory, "setup_output_directory"))
+
+    # The report is written even when a stage fails; that run's timings matter most
+    try:
+        with tqdm(total=len(steps), desc="Overall Progress", unit="step") as progress_bar:
+            for step_description, step_function, step_name in steps:
+                tqdm.write(f"Starting: {step_description}")
+                with metrics.timed(f"stage.{step_name}"):
+                    step_function()
+                progress_bar.update(1)
+    finally:
+        metrics.write_report()
 
 if __name__ == "__main__":
     main()
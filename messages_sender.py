@@ -1,17 +1,27 @@
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
-import json
-import time
-import smtplib
 from email.message import EmailMessage
 import config  # Your configuration file with email settings, JSON file path, etc.
+from video_index import STAGE_SENT, open_video_index
+from stage_io import read_stage_channels, stage_file_exists, stage_path
+from metrics import increment, timed
+from smtp_client import SMTPSession, build_email_rate_limiter
+from digest_renderer import DigestPart, DigestRenderer, RenderedVideo
+
+def channel_key(channel: str) -> str:
+    """Normalized channel name, so "@Name" in channels.txt matches "name" in SUBSCRIPTIONS"""
+    return channel.strip().lstrip('@').lower()
+
 
 class MessageSender:
     def __init__(self):
         """Initialize message sender with configuration."""
         self.config = config
         self.logger = self.config.LOGGER
+        self.index = open_video_index()
+        self.rate_limiter = build_email_rate_limiter()
+        self.renderer = DigestRenderer(format_time=self.format_upload_time)
 
     def format_upload_time(self, iso_time: str) -> str:
         """
@@ -40,43 +50,33 @@ class MessageSender:
         Returns:
             Optional[str]: HTML block containing channel details, or None if no video data.
         """
-        html_parts = []
-        channel_name = channel.get('channel_name', 'Unknown Channel')
-
-        for video in channel.get('videos', []):
-            if video:
-                title = video.get('title', 'No title available')
-                upload_time = self.format_upload_time(video.get('upload_time', ''))
-                description = video.get('description', 'No description available')
-
-                # Build chapter summaries section.
-                chapter_summaries = ""
-                if video.get('chapter_summaries'):
-                    for chapter, summary in video['chapter_summaries'].items():
-                        chapter_summaries += (
-                            f"<p style='margin: 0 0 10px 0;'><strong>{chapter}:</strong> {summary}</p>"
-                        )
-                else:
-                    chapter_summaries = "<p>No chapter summaries available</p>"
-
-                video_html = f"""
-                <div style="margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px solid #e0e0e0;">
-                  <h2 style="color: #333;">Channel: {channel_name}</h2>
-                  <h3 style="color: #555;">Title: {title}</h3>
-                  <p style="margin: 5px 0;"><strong>Upload Time:</strong> {upload_time}</p>
-                  <p style="margin: 5px 0;"><strong>Description:</strong> {description}</p>
-                  <h3 style="color: #333; margin-top: 20px;">Chapter Summaries</h3>
-                  {chapter_summaries}
-                </div>
-                """
-                html_parts.append(video_html)
+        videos = self.renderer.render_channel(channel)
 
         # If no valid video data was found, return None.
-        if not html_parts:
+        if not videos:
             return None
 
         # Combine all video blocks for this channel.
-        return "".join(html_parts)
+        return "".join(video.html for video in videos)
+
+    def render_channel_blocks(self, channels: List[Dict]) -> List[Tuple[str, List[RenderedVideo]]]:
+        """
+        Render every channel's videos once.
+
+        Args:
+            channels (List[Dict]): List of channel data dictionaries.
+
+        Returns:
+            List[Tuple[str, List[RenderedVideo]]]: Channel name and rendered videos, in input order,
+                for channels with video data.
+        """
+        blocks = []
+        with timed("email.render"):
+            for channel in channels:
+                videos = self.renderer.render_channel(channel)
+                if videos:
+                    blocks.append((channel.get('channel_name', ''), videos))
+        return blocks
 
     def build_full_email_html(self, channels: List[Dict]) -> Optional[str]:
         """
@@ -88,56 +88,174 @@ class MessageSender:
         Returns:
             Optional[str]: Full HTML content for the email, or None if no channel has video data.
         """
-        combined_html_parts = []
-        for channel in channels:
-            channel_html = self.create_channel_html(channel)
-            if channel_html:
-                combined_html_parts.append(channel_html)
-
-        if not combined_html_parts:
+        videos = [video for _, channel_videos in self.render_channel_blocks(channels) for video in channel_videos]
+        if not videos:
             return None
+        return self.renderer.document(videos).html
+
+    def build_message(
+        self,
+        recipient_email: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        subject: str = 'Channel Video Summary'
+    ) -> EmailMessage:
+        """
+        Build the digest email for one recipient.
+
+        Args:
+            recipient_email (str): Recipient's email address.
+            html_content (str): HTML formatted email content.
+            text_content (Optional[str]): Plain text version of the content.
+            subject (str): Subject line.
+
+        Returns:
+            EmailMessage: Message with a plain text part and the HTML alternative.
+        """
+        email_message = EmailMessage()
+        # Provide a plain text fallback.
+        email_message.set_content(text_content or "Please view this email in an HTML-compatible email viewer.")
+        email_message.add_alternative(html_content, subtype='html')
+        email_message['Subject'] = subject
+        email_message['From'] = self.config.EMAIL_SENDER
+        email_message['To'] = recipient_email
+        return email_message
 
-        full_html = f"""<!DOCTYPE html>
-<html>
-<head>
-  <meta charset="UTF-8">
-  <title>Channel Video Summary</title>
-</head>
-<body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px; margin: 0;">
-  <div style="max-width: 700px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 8px; box-shadow: 0 0 15px rgba(0, 0, 0, 0.1);">
-    {''.join(combined_html_parts)}
-    <p style="text-align: center; color: #888; font-size: 0.9em;">&copy; 2025 Your Company Name</p>
-  </div>
-</body>
-</html>"""
-        return full_html
-
-    def send_email_messages(self, recipient_email: str, html_content: str) -> None:
-        """
-        Send an HTML email with the formatted content.
+    def build_messages(self, recipient_email: str, parts: List[DigestPart]) -> List[EmailMessage]:
+        """
+        Build the emails of a digest that was split into parts.
+
+        Args:
+            recipient_email (str): Recipient's email address.
+            parts (List[DigestPart]): HTML and plain text of every email.
+
+        Returns:
+            List[EmailMessage]: One message per part, numbered in the subject when there are several.
+        """
+        subject = 'Channel Video Summary'
+        return [
+            self.build_message(
+                recipient_email,
+                part.html,
+                part.text,
+                f"{subject} ({number}/{len(parts)})" if len(parts) > 1 else subject
+            )
+            for number, part in enumerate(parts, start=1)
+        ]
+
+    def send_email_messages(self, recipient_email: str, html_content: str, text_content: Optional[str] = None) -> bool:
+        """
+        Send an HTML email with the formatted content over its own SMTP connection.
         
         Args:
             recipient_email (str): Recipient's email address.
             html_content (str): HTML formatted email content.
+            text_content (Optional[str]): Plain text version of the content.
+
+        Returns:
+            bool: True if the email was handed to the SMTP server.
+        """
+        return self._send_alone(self.build_message(recipient_email, html_content, text_content))
+
+    def send_batch(self, digests: Dict[str, List[DigestPart]]) -> Dict[str, bool]:
+        """
+        Send every recipient their digest emails.
+
+        In "session" delivery mode all messages go over one logged-in SMTP
+        connection; in "per_message" mode each one opens its own.
+
+        Args:
+            digests (Dict[str, List[DigestPart]]): Digest parts by recipient email address.
+
+        Returns:
+            Dict[str, bool]: Per recipient, whether every part was handed to the SMTP server.
         """
+        delivered = {}
+
+        if self.config.EMAIL_DELIVERY_MODE != "session":
+            for recipient, parts in digests.items():
+                delivered[recipient] = True
+                for message in self.build_messages(recipient, parts):
+                    delivered[recipient] &= self._send_alone(message)
+            return delivered
+
+        with SMTPSession(rate_limiter=self.rate_limiter) as session:
+            for recipient, parts in digests.items():
+                delivered[recipient] = True
+                for message in self.build_messages(recipient, parts):
+                    try:
+                        with timed("email.send"):
+                            session.send(message)
+                        increment("email.sent")
+                    except Exception as e:
+                        self.logger.error(f"Email sending error for {recipient}: {e}")
+                        delivered[recipient] = False
+        return delivered
+
+    @timed("email.send")
+    def _send_alone(self, message: EmailMessage) -> bool:
+        """Send a message over its own SMTP connection"""
         try:
-            email_message = EmailMessage()
-            # Provide a plain text fallback.
-            email_message.set_content("Please view this email in an HTML-compatible email viewer.")
-            email_message.add_alternative(html_content, subtype='html')
-            email_message['Subject'] = 'Channel Video Summary'
-            email_message['From'] = self.config.EMAIL_SENDER
-            email_message['To'] = recipient_email
-
-            with smtplib.SMTP(self.config.EMAIL_SMTP_SERVER, self.config.EMAIL_SMTP_PORT) as server:
-                server.starttls()
-                server.login(self.config.EMAIL_SENDER, self.config.EMAIL_PASSWORD)
-                server.send_message(email_message)
-
-            # Optional: pause briefly between emails.
-            time.sleep(5)
+            with SMTPSession(rate_limiter=self.rate_limiter) as session:
+                session.send(message)
+            increment("email.sent")
+            return True
         except Exception as e:
-            self.logger.error(f"Email sending error: {e}")
+            self.logger.error(f"Email sending error for {message['To']}: {e}")
+            return False
+
+    def subscribed_channels(self, recipient: str, channel_names: List[str]) -> List[str]:
+        """
+        Channels a recipient receives, per config.SUBSCRIPTIONS.
+
+        Args:
+            recipient (str): Recipient's email address.
+            channel_names (List[str]): Channels of the digest.
+
+        Returns:
+            List[str]: The subscribed channels among channel_names, or all of them for
+                recipients without a subscription entry.
+        """
+        subscriptions = self.config.SUBSCRIPTIONS.get(recipient)
+        if subscriptions is None:
+            return channel_names
+
+        wanted = {channel_key(channel) for channel in subscriptions}
+        return [name for name in channel_names if channel_key(name) in wanted]
+
+    def build_recipient_digests(
+        self, channels: List[Dict]
+    ) -> Tuple[Dict[str, List[DigestPart]], Dict[str, List[str]]]:
+        """
+        Build every recipient's digest from videos rendered once.
+
+        Recipients with the same subscribed channels share one assembled digest.
+
+        Args:
+            channels (List[Dict]): Summarized channel data.
+
+        Returns:
+            Tuple[Dict[str, List[DigestPart]], Dict[str, List[str]]]: Digest emails by recipient
+                (recipients with nothing to read are left out) and the channels in each digest.
+        """
+        blocks = self.render_channel_blocks(channels)
+        channel_names = [name for name, _ in blocks]
+
+        digests = {}
+        included = {}
+        assembled: Dict[Tuple[str, ...], List[DigestPart]] = {}
+        for recipient in self.config.NUMBERS:
+            names = tuple(self.subscribed_channels(recipient, channel_names))
+            if names not in assembled:
+                wanted = set(names)
+                assembled[names] = self.renderer.parts([
+                    video for name, videos in blocks if name in wanted for video in videos
+                ])
+            if assembled[names]:
+                digests[recipient] = assembled[names]
+                included[recipient] = list(names)
+
+        return digests, included
 
     def process_input_json(self) -> Optional[List[Dict]]:
         """
@@ -146,29 +264,79 @@ class MessageSender:
         Returns:
             Optional[List[Dict]]: Processed JSON data or None if file not found.
         """
-        if not os.path.exists(self.config.SUMMARIZED_TRANSCRIPT_FILE):
-            self.logger.error(f"Input file not found: {self.config.SUMMARIZED_TRANSCRIPT_FILE}")
+        if not stage_file_exists(self.config.SUMMARIZED_TRANSCRIPT_FILE):
+            self.logger.error(f"Input file not found: {stage_path(self.config.SUMMARIZED_TRANSCRIPT_FILE)}")
             return None
 
-        with open(self.config.SUMMARIZED_TRANSCRIPT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = read_stage_channels(self.config.SUMMARIZED_TRANSCRIPT_FILE)
 
-        full_email_html = self.build_full_email_html(data)
-        if not full_email_html:
+        return self.send_digest(data)
+
+    def send_digest(self, data: List[Dict]) -> List[Dict]:
+        """
+        Build the full HTML email for summarized channel data and send it to each recipient.
+
+        Args:
+            data (List[Dict]): Summarized channel data.
+
+        Returns:
+            List[Dict]: The same channel data.
+        """
+        digests, included = self.build_recipient_digests(data)
+        if not digests:
             self.logger.info("No valid channel data found to send an email.")
             return data
 
         # Send one combined email per recipient.
-        for recipient in self.config.NUMBERS:
-            self.send_email_messages(recipient, full_email_html)
+        delivered = self.send_batch(digests)
+        self.record_delivery(data, included, delivered)
 
         self.logger.info("Message sending process completed")
         return data
 
+    def record_delivery(self, data: List[Dict], included: Dict[str, List[str]], delivered: Dict[str, bool]) -> None:
+        """
+        Mark the videos of channels that reached every subscribed recipient as sent.
+
+        Args:
+            data (List[Dict]): Summarized channel data.
+            included (Dict[str, List[str]]): Channels in each recipient's digest.
+            delivered (Dict[str, bool]): Whether each recipient's digest was sent.
+        """
+        # Only videos that reached every subscribed recipient are skipped by later runs.
+        if self.index:
+            failed_channels = {
+                channel_key(name)
+                for recipient, names in included.items() if not delivered.get(recipient)
+                for name in names
+            }
+            sent_channels = {
+                channel_key(name)
+                for recipient, names in included.items() if delivered.get(recipient)
+                for name in names
+            }
+            self.mark_videos_sent([
+                channel for channel in data
+                if channel_key(channel.get('channel_name', '')) in sent_channels - failed_channels
+            ])
+
+    def mark_videos_sent(self, channels: List[Dict]) -> None:
+        """
+        Record every video in the digest as delivered in the video index.
+
+        Args:
+            channels (List[Dict]): List of channel data dictionaries.
+        """
+        for channel in channels:
+            for video in channel.get('videos', []):
+                if video and video.get('id'):
+                    self.index.mark_complete(video['id'], STAGE_SENT)
+
 def MessageSenderProcess():
     """Main entry point for sending emails."""
     sender = MessageSender()
     sender.process_input_json()
 
 if __name__ == "__main__":
+    config.setup_logging()
     MessageSenderProcess()
@@ -0,0 +1,171 @@
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import os, json, math, time, threading, config
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Metrics:
+    """
+    In-process registry of timings and counters
+
+    Timers keep every observed duration, which is cheap at the scale of one
+    run (a few thousand calls) and gives exact percentiles. All methods are
+    thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings: Dict[str, List[float]] = {}
+        self._counters: Dict[str, float] = {}
+        self.started = time.time()
+        self._started_monotonic = time.monotonic()
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        Time a block, or a function when used as a decorator
+
+        Failed calls are timed too and counted under "<name>.errors".
+
+        Args:
+            name (str): Metric name, e.g. "ollama.request"
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one duration"""
+        with self._lock:
+            self._timings.setdefault(name, []).append(seconds)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def report(self) -> Dict:
+        """
+        Summary of everything recorded so far
+
+        Returns:
+            Dict: Run start and wall time, per-timer count, total, mean, p50, p95,
+                max and calls per second of wall time, and the counters
+        """
+        with self._lock:
+            timings = {name: sorted(values) for name, values in self._timings.items()}
+            counters = dict(self._counters)
+
+        wall_seconds = time.monotonic() - self._started_monotonic
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started)),
+            'wall_seconds': round(wall_seconds, 3),
+            'timings': {
+                name: {
+                    'count': len(values),
+                    'total_seconds': round(sum(values), 6),
+                    'mean_seconds': round(sum(values) / len(values), 6),
+                    'p50_seconds': round(percentile(values, 0.50), 6),
+                    'p95_seconds': round(percentile(values, 0.95), 6),
+                    'max_seconds': round(values[-1], 6),
+                    'per_second': round(len(values) / wall_seconds, 3) if wall_seconds else 0.0
+                }
+                for name, values in sorted(timings.items())
+            },
+            'counters': dict(sorted(counters.items()))
+        }
+
+    def prometheus_text(self, prefix: str = "yt_summariser") -> str:
+        """
+        The report in the Prometheus text exposition format
+
+        Timers become summaries with 0.5 and 0.95 quantiles, counters become
+        counters; metric names go into a "name" label.
+        """
+        report = self.report()
+        lines = [
+            f"# HELP {prefix}_duration_seconds Duration of pipeline stages and external calls",
+            f"# TYPE {prefix}_duration_seconds summary"
+        ]
+        for name, timing in report['timings'].items():
+            label = f'name="{name}"'
+            lines.append(f'{prefix}_duration_seconds{{{label},quantile="0.5"}} {timing["p50_seconds"]}')
+            lines.append(f'{prefix}_duration_seconds{{{label},quantile="0.95"}} {timing["p95_seconds"]}')
+            lines.append(f'{prefix}_duration_seconds_sum{{{label}}} {timing["total_seconds"]}')
+            lines.append(f'{prefix}_duration_seconds_count{{{label}}} {timing["count"]}')
+
+        lines.append(f"# HELP {prefix}_events_total Events counted during the run")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in report['counters'].items():
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+
+        lines.append(f"# HELP {prefix}_run_seconds Wall time of the run")
+        lines.append(f"# TYPE {prefix}_run_seconds gauge")
+        lines.append(f"{prefix}_run_seconds {report['wall_seconds']}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Forget everything and restart the wall clock"""
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+            self.started = time.time()
+            self._started_monotonic = time.monotonic()
+
+
+# Registry shared by all stages of the process
+METRICS = Metrics()
+
+timed = METRICS.timed
+observe = METRICS.observe
+increment = METRICS.increment
+
+
+def _write_file(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def write_report(path: Optional[str] = None, prometheus_path: Optional[str] = None) -> Optional[Dict]:
+    """
+    Write the metrics of the run as JSON and optionally in Prometheus text format
+
+    Args:
+        path (Optional[str]): JSON report file, defaults to config.METRICS_REPORT_FILE
+        prometheus_path (Optional[str]): Prometheus file, defaults to config.METRICS_PROMETHEUS_FILE
+            (not written when empty)
+
+    Returns:
+        Optional[Dict]: The report, or None when METRICS_ENABLED is disabled
+    """
+    if not config.METRICS_ENABLED:
+        return None
+
+    report = METRICS.report()
+    path = path or config.METRICS_REPORT_FILE
+    prometheus_path = prometheus_path or config.METRICS_PROMETHEUS_FILE
+
+    try:
+        _write_file(path, json.dumps(report, indent=4))
+        config.LOGGER.info(f"Metrics report saved to {path}")
+        if prometheus_path:
+            _write_file(prometheus_path, METRICS.prometheus_text())
+    except OSError as e:
+        config.LOGGER.error(f"Could not write metrics report: {e}")
+
+    return report
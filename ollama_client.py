@@ -0,0 +1,253 @@
+from typing import Callable, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json, requests, config
+from metrics import increment, observe, timed
+
+
+# Duration fields of an Ollama response, reported in nanoseconds
+TIMING_FIELDS = ('total_duration', 'load_duration', 'prompt_eval_duration', 'eval_duration')
+
+
+def record_response_metrics(result: Dict) -> None:
+    """Record Ollama's own prompt evaluation and generation times and token counts"""
+    if result.get('prompt_eval_duration') is not None:
+        observe("ollama.prompt_eval", result['prompt_eval_duration'] / 1e9)
+    if result.get('eval_duration') is not None:
+        observe("ollama.eval", result['eval_duration'] / 1e9)
+    increment("ollama.prompt_tokens", result.get('prompt_eval_count') or 0)
+    increment("ollama.eval_tokens", result.get('eval_count') or 0)
+
+
+class OllamaClient:
+    """
+    Client for Ollama's /api/generate endpoint
+
+    Requests share one pooled session, so connections to Ollama are kept
+    alive between calls. Responses can be streamed as NDJSON, with every
+    token passed to a callback as it arrives.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        retries: Optional[int] = None
+    ):
+        """
+        Args:
+            url (Optional[str]): Generate endpoint, defaults to config.OLLAMA_URL
+            pool_size (Optional[int]): Connections kept open, defaults to config.SUMMARIZE_MAX_IN_FLIGHT
+            connect_timeout (Optional[float]): Seconds to establish a connection
+            read_timeout (Optional[float]): Seconds to wait for the response (or the next streamed line)
+            retries (Optional[int]): Retries when a connection to Ollama cannot be established
+        """
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.url = url or self.config.OLLAMA_URL
+        self.timeout = (
+            connect_timeout or self.config.OLLAMA_CONNECT_TIMEOUT,
+            read_timeout or self.config.OLLAMA_READ_TIMEOUT
+        )
+        pool_size = max(1, pool_size or self.config.SUMMARIZE_MAX_IN_FLIGHT)
+        retries = self.config.OLLAMA_CONNECTION_RETRIES if retries is None else retries
+
+        # Only connection failures are retried here; 429/503 answers are left
+        # to the caller's rate limiter.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=0.5)
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+        **options
+    ) -> Dict:
+        """
+        Run a prompt through the model
+
+        Args:
+            model (str): Model name
+            prompt (str): Prompt text
+            stream (bool): Stream the generation as NDJSON instead of waiting for the full response
+            on_token (Optional[Callable[[str], None]]): Called with every streamed piece of text
+            **options: Extra request fields (e.g. format, options)
+
+        Returns:
+            Dict: Final Ollama response, with the complete text under 'response'
+                and timing fields such as eval_duration and prompt_eval_duration
+
+        Raises:
+            requests.HTTPError: If Ollama answers with an error status
+        """
+        payload = {"model": model, "prompt": prompt, "stream": stream, **options}
+
+        with timed("ollama.request"):
+            result = self._post(payload, stream, on_token)
+
+        record_response_metrics(result)
+        return result
+
+    def _post(self, payload: Dict, stream: bool, on_token: Optional[Callable[[str], None]]) -> Dict:
+        with self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream) as response:
+            response.raise_for_status()
+
+            if not stream:
+                return response.json()
+
+            pieces = []
+            result = {}
+            for line in response.iter_lines():
+                if not line:
+                    continue
+
+                result = json.loads(line)
+                if result.get('error'):
+                    raise requests.HTTPError(result['error'], response=response)
+
+                piece = result.get('response', '')
+                if piece:
+                    pieces.append(piece)
+                    if on_token:
+                        on_token(piece)
+
+                if result.get('done'):
+                    break
+
+        result['response'] = ''.join(pieces)
+        return result
+
+    @staticmethod
+    def timings(result: Dict) -> Dict[str, float]:
+        """
+        Timing fields of a response in seconds, plus generation speed
+
+        Args:
+            result (Dict): Response returned by generate
+
+        Returns:
+            Dict[str, float]: Durations in seconds and eval tokens per second
+        """
+        timings = {
+            field: result[field] / 1e9
+            for field in TIMING_FIELDS
+            if result.get(field) is not None
+        }
+        if result.get('eval_count') and result.get('eval_duration'):
+            timings['eval_tokens_per_second'] = result['eval_count'] / (result['eval_duration'] / 1e9)
+        return timings
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+
+
+class AsyncOllamaClient:
+    """
+    asyncio client for Ollama's /api/generate endpoint
+
+    Requests share one aiohttp session whose connector keeps at most
+    pool_size connections open, so any number of coroutines can wait on
+    Ollama without a thread each. Create, use and close it on the same
+    running event loop.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            url (Optional[str]): Generate endpoint, defaults to config.OLLAMA_URL
+            pool_size (Optional[int]): Connections kept open, defaults to config.SUMMARIZE_MAX_IN_FLIGHT
+            connect_timeout (Optional[float]): Seconds to establish a connection
+            read_timeout (Optional[float]): Seconds to wait for the response (or the next streamed line)
+        """
+        import aiohttp  # Only the async pipeline needs aiohttp; keep it off the other stages' imports
+
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.url = url or self.config.OLLAMA_URL
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max(1, pool_size or self.config.SUMMARIZE_MAX_IN_FLIGHT)),
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=connect_timeout or self.config.OLLAMA_CONNECT_TIMEOUT,
+                sock_read=read_timeout or self.config.OLLAMA_READ_TIMEOUT
+            )
+        )
+
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+        **options
+    ) -> Dict:
+        """
+        Run a prompt through the model, see OllamaClient.generate
+
+        Raises:
+            aiohttp.ClientResponseError: If Ollama answers with an error status
+        """
+        payload = {"model": model, "prompt": prompt, "stream": stream, **options}
+
+        with timed("ollama.request"):
+            result = await self._post(payload, stream, on_token)
+
+        record_response_metrics(result)
+        return result
+
+    async def _post(self, payload: Dict, stream: bool, on_token: Optional[Callable[[str], None]]) -> Dict:
+        import aiohttp
+
+        async with self.session.post(self.url, json=payload) as response:
+            response.raise_for_status()
+
+            if not stream:
+                return await response.json(content_type=None)
+
+            pieces = []
+            result = {}
+            async for line in response.content:
+                if not line.strip():
+                    continue
+
+                result = json.loads(line)
+                if result.get('error'):
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status=response.status, message=result['error'], headers=response.headers
+                    )
+
+                piece = result.get('response', '')
+                if piece:
+                    pieces.append(piece)
+                    if on_token:
+                        on_token(piece)
+
+                if result.get('done'):
+                    break
+
+        result['response'] = ''.join(pieces)
+        return result
+
+    timings = staticmethod(OllamaClient.timings)
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        await self.session.close()
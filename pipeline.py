@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional
+import queue, threading, config
+from concurrency import call_with_timeout, run_ordered
+from stage_io import StageWriter
+from videos_extractor import YouTubeChannelExtractor
+from transcript_extractor import YouTubeTranscriptExtractor
+from text_summarizer import TranscriptSummarizer
+from messages_sender import MessageSender
+
+
+# Tells a stage worker that no more items will arrive
+_STOP = object()
+
+
+class StreamingPipeline:
+    """
+    Run all stages at once, passing videos between them through bounded queues
+
+    Channel scans feed transcript workers, which feed summarizer workers, so a
+    video is summarized while other channels are still being scanned. The
+    digest is sent once every video has been summarized. The intermediate JSON
+    files of the batch pipeline are still written, in INTERMEDIATE_FORMAT, when
+    STREAM_JSON_SINKS is set. They are written once the run finishes, so
+    --resume cannot continue an interrupted streaming run.
+    """
+
+    def __init__(
+        self,
+        channel_extractor: Optional[YouTubeChannelExtractor] = None,
+        transcript_extractor: Optional[YouTubeTranscriptExtractor] = None,
+        summarizer: Optional[TranscriptSummarizer] = None,
+        sender: Optional[MessageSender] = None
+    ):
+        """Initialize the pipeline with the stage implementations (defaults to the standard ones)"""
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.channel_extractor = channel_extractor or YouTubeChannelExtractor()
+        self.transcript_extractor = transcript_extractor or YouTubeTranscriptExtractor()
+        self.summarizer = summarizer or TranscriptSummarizer()
+        self.sender = sender or MessageSender()
+
+        self.transcript_queue = queue.Queue(maxsize=self.config.STREAM_QUEUE_SIZE)
+        self.summary_queue = queue.Queue(maxsize=self.config.STREAM_QUEUE_SIZE)
+
+        # Per channel: scanned videos, transcripts and summaries by video position
+        self._lock = threading.Lock()
+        self.channels: List[str] = []
+        self.extracted: List[List[Dict]] = []
+        self.transcripts: List[List[Optional[Dict]]] = []
+        self.summaries: List[List[Optional[Dict]]] = []
+
+    def _scan_channel(self, item) -> None:
+        """Scan one channel and queue its videos for transcript extraction"""
+        channel_index, channel = item
+        videos = call_with_timeout(
+            self.channel_extractor.scan_channel,
+            channel,
+            timeout=self.config.CHANNEL_SCAN_TIMEOUT,
+            default=[],
+            name="stream-scan"
+        )
+
+        with self._lock:
+            self.extracted[channel_index] = videos
+            self.transcripts[channel_index] = [None] * len(videos)
+            self.summaries[channel_index] = [None] * len(videos)
+
+        for video_index, video in enumerate(videos):
+            self.transcript_queue.put((channel_index, video_index, video))
+
+    def _transcribe_worker(self) -> None:
+        """Extract transcripts until told to stop and queue them for summarization"""
+        while True:
+            item = self.transcript_queue.get()
+            if item is _STOP:
+                return
+
+            channel_index, video_index, video = item
+            try:
+                transcript = call_with_timeout(
+                    self.transcript_extractor.process_video,
+                    video,
+                    timeout=self.config.TRANSCRIPT_TIMEOUT,
+                    name="stream-transcript"
+                )
+            except Exception as e:
+                self.logger.error(f"Transcript stage failed for video {video.get('id')}: {e}")
+                continue
+
+            if not transcript:
+                continue
+
+            with self._lock:
+                self.transcripts[channel_index][video_index] = dict(transcript)
+            self.summary_queue.put((channel_index, video_index, transcript))
+
+    def _summarize_worker(self) -> None:
+        """Summarize videos until told to stop"""
+        while True:
+            item = self.summary_queue.get()
+            if item is _STOP:
+                return
+
+            channel_index, video_index, video = item
+            try:
+                summary = self.summarizer.summarize_video(video)
+            except Exception as e:
+                self.logger.error(f"Summarization stage failed for video {video.get('id')}: {e}")
+                continue
+
+            with self._lock:
+                self.summaries[channel_index][video_index] = summary
+
+    def _start_workers(self, target, count: int, name: str) -> List[threading.Thread]:
+        workers = [
+            threading.Thread(target=target, name=f"{name}-{i}", daemon=True)
+            for i in range(max(1, count))
+        ]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    def _stop_workers(self, work_queue: queue.Queue, workers: List[threading.Thread]) -> None:
+        for _ in workers:
+            work_queue.put(_STOP)
+        for worker in workers:
+            worker.join()
+
+    def _channel_data(self, per_channel: List[List[Any]]) -> List[Dict]:
+        """Group per-video results by channel in channels.txt order"""
+        return [
+            {
+                'channel_name': channel,
+                'videos': [video for video in videos if video]
+            }
+            for channel, videos in zip(self.channels, per_channel)
+        ]
+
+    def _write_stage_file(self, path: str, data: List[Dict]) -> None:
+        try:
+            with StageWriter(path) as writer:
+                writer.write_channels(data)
+        except Exception as e:
+            self.logger.error(f"Error saving {path}: {e}")
+
+    def run(self, channels: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Scan, transcribe, summarize and send the digest for all channels
+
+        Args:
+            channels (Optional[List[str]]): Channels to process, read from channels.txt if not provided
+
+        Returns:
+            List[Dict]: Summarized channel data, in the same shape as SUMMARIZED_TRANSCRIPT_FILE
+        """
+        self.channels = channels if channels is not None else (self.channel_extractor.read_channels() or [])
+        self.extracted = [[] for _ in self.channels]
+        self.transcripts = [[] for _ in self.channels]
+        self.summaries = [[] for _ in self.channels]
+
+        transcribers = self._start_workers(
+            self._transcribe_worker, self.config.TRANSCRIPT_WORKERS, "stream-transcript"
+        )
+        summarizers = self._start_workers(
+            self._summarize_worker, self.config.SUMMARIZE_MAX_IN_FLIGHT, "stream-summarize"
+        )
+
+        run_ordered(
+            self._scan_channel,
+            list(enumerate(self.channels)),
+            max_workers=self.config.CHANNEL_SCAN_WORKERS,
+            name="stream-scan"
+        )
+
+        # Stages drain in order: once every scan is queued, transcribers can be
+        # stopped, and once they are done, summarizers.
+        self._stop_workers(self.transcript_queue, transcribers)
+        self._stop_workers(self.summary_queue, summarizers)
+
+        summarized = self._channel_data(self.summaries)
+
+        if self.config.STREAM_JSON_SINKS:
+            self._write_stage_file(self.config.EXTRACTED_VIDEOS_FILE, self._channel_data(self.extracted))
+            self._write_stage_file(self.config.VIDEO_TRANSCRIPT_FILE, self._channel_data(self.transcripts))
+            self._write_stage_file(self.config.SUMMARIZED_TRANSCRIPT_FILE, summarized)
+
+        self.summarizer.save_checkpoint()
+        self.summarizer.log_stats()
+        self.sender.send_digest(summarized)
+        return summarized
+
+
+def StreamingPipelineProcess():
+    """Main entry point for the streaming pipeline"""
+    pipeline = StreamingPipeline()
+    pipeline.run()
@@ -0,0 +1,141 @@
+from typing import Optional
+import time, threading, config
+
+
+# HTTP statuses that mean "slow down and try again"
+RETRYABLE_STATUSES = (429, 503)
+
+
+class RateLimiter:
+    """
+    Throttle for calls to a model backend
+
+    The base limiter never delays a call on its own, which is what a local
+    Ollama wants. It only backs off exponentially after the backend answers
+    429 or 503, and resets once a call succeeds. All waiting is accumulated
+    in throttled_seconds. Instances are thread-safe.
+    """
+
+    def __init__(self, backoff_initial: Optional[float] = None, backoff_max: Optional[float] = None):
+        """
+        Args:
+            backoff_initial (Optional[float]): First back-off delay in seconds
+            backoff_max (Optional[float]): Upper bound for the back-off delay in seconds
+        """
+        self.backoff_initial = backoff_initial or config.OLLAMA_BACKOFF_INITIAL
+        self.backoff_max = backoff_max or config.OLLAMA_BACKOFF_MAX
+        self.throttled_seconds = 0.0
+        self._backoff = self.backoff_initial
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, now: float) -> float:
+        """Claim the right to make one call, returning how long the caller must wait"""
+        return 0.0
+
+    def _claim(self) -> float:
+        """Reserve the next call, returning how long the caller must wait before making it"""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(self._blocked_until - now, self._reserve(now), 0.0)
+            self.throttled_seconds += delay
+        return delay
+
+    def acquire(self) -> float:
+        """
+        Block until the next call may be made
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        delay = self._claim()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """
+        Wait without blocking the event loop until the next call may be made
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        import asyncio  # Only the async pipeline waits here; keep it off the other stages' imports
+
+        delay = self._claim()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def report(self, status_code: Optional[int], retry_after: Optional[float] = None) -> bool:
+        """
+        Feed the outcome of a call back into the limiter
+
+        Args:
+            status_code (Optional[int]): HTTP status of the response, None if no response arrived
+            retry_after (Optional[float]): Seconds from a Retry-After header, if the backend sent one
+
+        Returns:
+            bool: True if the call was rejected with a retryable status and should be retried
+        """
+        with self._lock:
+            if status_code not in RETRYABLE_STATUSES:
+                self._backoff = self.backoff_initial
+                return False
+
+            delay = retry_after if retry_after is not None else self._backoff
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._backoff = min(self._backoff * 2, self.backoff_max)
+            return True
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """Rate limiter allowing `rate` calls per second with bursts of up to `burst` calls"""
+
+    def __init__(self, rate: float, burst: int = 1, **kwargs):
+        """
+        Args:
+            rate (float): Sustained calls per second
+            burst (int): Bucket size
+        """
+        super().__init__(**kwargs)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _reserve(self, now: float) -> float:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # The token is taken immediately; a negative balance is a reservation
+        # that later callers queue behind.
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def build_rate_limiter() -> RateLimiter:
+    """Create a rate limiter as configured by OLLAMA_RATE_LIMIT"""
+    if config.OLLAMA_RATE_LIMIT == "token_bucket":
+        return TokenBucketRateLimiter(config.OLLAMA_REQUESTS_PER_SECOND, config.OLLAMA_BURST)
+    return RateLimiter()
+
+
+_shared_rate_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter() -> RateLimiter:
+    """The process-wide rate limiter used by every summarization call"""
+    global _shared_rate_limiter
+    with _shared_lock:
+        if _shared_rate_limiter is None:
+            _shared_rate_limiter = build_rate_limiter()
+        return _shared_rate_limiter
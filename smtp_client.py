@@ -0,0 +1,203 @@
+from email.message import EmailMessage
+from typing import Optional
+import smtplib, config
+from rate_limiter import RateLimiter, TokenBucketRateLimiter
+from metrics import increment, timed
+
+
+# Errors after which the connection is considered lost and re-established
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+def build_email_rate_limiter() -> RateLimiter:
+    """Limiter for outgoing emails as configured by EMAIL_MESSAGES_PER_SECOND and EMAIL_BURST"""
+    if config.EMAIL_MESSAGES_PER_SECOND and config.EMAIL_MESSAGES_PER_SECOND > 0:
+        return TokenBucketRateLimiter(config.EMAIL_MESSAGES_PER_SECOND, config.EMAIL_BURST)
+    return RateLimiter()
+
+
+class SMTPSession:
+    """
+    One logged-in SMTP connection used for any number of messages
+
+    The connection (and STARTTLS and login) is set up lazily on the first
+    send. If the server drops it, the session reconnects and retries the
+    message up to EMAIL_RECONNECT_ATTEMPTS times. Messages are paced by a
+    rate limiter instead of a fixed pause.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: Optional[bool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        reconnect_attempts: Optional[int] = None
+    ):
+        """
+        Args:
+            host (Optional[str]): SMTP server, defaults to config.EMAIL_SMTP_SERVER
+            port (Optional[int]): SMTP port, defaults to config.EMAIL_SMTP_PORT
+            username (Optional[str]): Login, defaults to config.EMAIL_SENDER
+            password (Optional[str]): Password, defaults to config.EMAIL_PASSWORD
+            use_tls (Optional[bool]): STARTTLS before logging in, defaults to config.EMAIL_USE_TLS
+            rate_limiter (Optional[RateLimiter]): Pacing of messages, see build_email_rate_limiter
+            reconnect_attempts (Optional[int]): Reconnects per message after a dropped connection
+        """
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.host = host or self.config.EMAIL_SMTP_SERVER
+        self.port = port or self.config.EMAIL_SMTP_PORT
+        self.username = username or self.config.EMAIL_SENDER
+        self.password = password or self.config.EMAIL_PASSWORD
+        self.use_tls = self.config.EMAIL_USE_TLS if use_tls is None else use_tls
+        self.rate_limiter = rate_limiter or build_email_rate_limiter()
+        self.reconnect_attempts = (
+            self.config.EMAIL_RECONNECT_ATTEMPTS if reconnect_attempts is None else reconnect_attempts
+        )
+        self._server: Optional[smtplib.SMTP] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def connect(self) -> None:
+        """Open the connection, upgrade it to TLS and log in"""
+        with timed("smtp.connect"):
+            server = smtplib.SMTP(self.host, self.port, timeout=self.config.EMAIL_SMTP_TIMEOUT)
+            try:
+                if self.use_tls:
+                    server.starttls()
+                if self.password:
+                    server.login(self.username, self.password)
+            except Exception:
+                server.close()
+                raise
+        self._server = server
+        increment("smtp.connections")
+
+    def send(self, message: EmailMessage) -> None:
+        """
+        Send a message over the session, reconnecting if the connection was lost
+
+        Raises:
+            smtplib.SMTPException: If the server rejects the message or cannot be reached
+        """
+        self.rate_limiter.acquire()
+
+        for attempt in range(self.reconnect_attempts + 1):
+            if self._server is None:
+                self.connect()
+
+            try:
+                with timed("smtp.send"):
+                    self._server.send_message(message)
+                return
+            except CONNECTION_ERRORS as e:
+                self._drop()
+                if attempt == self.reconnect_attempts:
+                    raise
+                self.logger.warning(f"SMTP connection lost ({e}), reconnecting")
+                increment("smtp.reconnects")
+
+    def _drop(self) -> None:
+        """Forget a broken connection"""
+        if self._server is not None:
+            try:
+                self._server.close()
+            finally:
+                self._server = None
+
+    def close(self) -> None:
+        """Log out and close the connection"""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        finally:
+            self._drop()
+
+
+class AsyncSMTPSession(SMTPSession):
+    """
+    SMTPSession for the event loop, on aiosmtplib
+
+    Same settings, reconnects and pacing as SMTPSession, but connect, send
+    and close are coroutines and it is used with `async with`. aiosmtplib
+    is only imported here, so the other stages do not load it; creating a
+    session without it installed raises ImportError.
+    """
+
+    def __init__(self, *args, **kwargs):
+        import aiosmtplib  # Only needed by the async pipeline
+
+        super().__init__(*args, **kwargs)
+        self._aiosmtplib = aiosmtplib
+        self._connection_errors = CONNECTION_ERRORS + (
+            aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, aiosmtplib.SMTPTimeoutError
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+        return False
+
+    async def connect(self) -> None:
+        """Open the connection, upgrade it to TLS and log in"""
+        with timed("smtp.connect"):
+            server = self._aiosmtplib.SMTP(
+                hostname=self.host, port=self.port, timeout=self.config.EMAIL_SMTP_TIMEOUT, start_tls=self.use_tls
+            )
+            await server.connect()
+            try:
+                if self.password:
+                    await server.login(self.username, self.password)
+            except Exception:
+                server.close()
+                raise
+        self._server = server
+        increment("smtp.connections")
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Send a message over the session, reconnecting if the connection was lost
+
+        Raises:
+            aiosmtplib.SMTPException: If the server rejects the message or cannot be reached
+        """
+        await self.rate_limiter.acquire_async()
+
+        for attempt in range(self.reconnect_attempts + 1):
+            if self._server is None:
+                await self.connect()
+
+            try:
+                with timed("smtp.send"):
+                    await self._server.send_message(message)
+                return
+            except self._connection_errors as e:
+                self._drop()
+                if attempt == self.reconnect_attempts:
+                    raise
+                self.logger.warning(f"SMTP connection lost ({e}), reconnecting")
+                increment("smtp.reconnects")
+
+    async def close(self) -> None:
+        """Log out and close the connection"""
+        if self._server is None:
+            return
+        try:
+            await self._server.quit()
+        except (self._aiosmtplib.SMTPException, OSError):
+            pass
+        finally:
+            self._drop()
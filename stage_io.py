@@ -0,0 +1,147 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import os, json, config
+
+
+def stage_path(path: str) -> str:
+    """
+    File actually used for an intermediate stage file
+
+    With INTERMEDIATE_FORMAT = "jsonl" the .json suffix of the configured
+    path becomes .jsonl.
+    """
+    if config.INTERMEDIATE_FORMAT == "jsonl":
+        return os.path.splitext(path)[0] + '.jsonl'
+    return path
+
+
+class StageWriter:
+    """
+    Writer for the channel/video data handed from one stage to the next
+
+    Records are (channel name, video) pairs in channel order. In "json" format
+    they are grouped in memory and dumped as the usual list of channels on
+    close. In "jsonl" format every record is appended as one line and flushed
+    immediately, so progress survives a crash and memory stays constant.
+    A channel's first record is a marker line with "video": null, which keeps
+    channels without videos in the output.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Configured stage file (see stage_path)
+        """
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.path = stage_path(path)
+        self.jsonl = self.config.INTERMEDIATE_FORMAT == "jsonl"
+        self.channels: Optional[List[Dict]] = None if self.jsonl else []
+        self._current_channel = None
+        self._file = open(self.path, 'w', encoding='utf-8') if self.jsonl else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def write(self, channel_name: str, video: Optional[Dict] = None) -> None:
+        """
+        Add a video of a channel, or just the channel when video is None
+
+        Args:
+            channel_name (str): Channel the video belongs to
+            video (Optional[Dict]): Video record
+        """
+        new_channel = channel_name != self._current_channel
+        self._current_channel = channel_name
+
+        if not self.jsonl:
+            if new_channel:
+                self.channels.append({'channel_name': channel_name, 'videos': []})
+            if video is not None:
+                self.channels[-1]['videos'].append(video)
+            return
+
+        if new_channel:
+            self._write_line({'channel_name': channel_name, 'video': None})
+        if video is not None:
+            self._write_line({'channel_name': channel_name, 'video': video})
+
+    def write_channels(self, channels: List[Dict]) -> None:
+        """Add channel data in the nested JSON layout"""
+        for channel in channels:
+            self.write(channel.get('channel_name', ''))
+            for video in channel.get('videos', []):
+                self.write(channel.get('channel_name', ''), video)
+
+    def _write_line(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """Finish the file; in "json" format this is when it is written"""
+        if self.jsonl:
+            if not self._file.closed:
+                self._file.close()
+            return
+
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.channels, f, indent=4, ensure_ascii=False)
+
+
+def stage_file_exists(path: str) -> bool:
+    """Whether the stage file exists in the configured format"""
+    return os.path.exists(stage_path(path))
+
+
+def iter_stage_records(path: str) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    Read a stage file as (channel name, video) records
+
+    Every channel yields a (channel name, None) record first, followed by its
+    videos. JSON Lines files are read one line at a time.
+
+    Args:
+        path (str): Configured stage file (see stage_path)
+
+    Yields:
+        Tuple[str, Optional[Dict]]: Channel name and video (None for the channel marker)
+    """
+    path = stage_path(path)
+
+    if config.INTERMEDIATE_FORMAT != "jsonl":
+        with open(path, 'r', encoding='utf-8') as f:
+            channels = json.load(f)
+        for channel in channels:
+            yield channel.get('channel_name', ''), None
+            for video in channel.get('videos', []):
+                yield channel.get('channel_name', ''), video
+        return
+
+    current_channel = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            channel_name = record.get('channel_name', '')
+
+            # Tolerate files whose marker line is missing
+            if channel_name != current_channel and record.get('video') is not None:
+                yield channel_name, None
+            current_channel = channel_name
+
+            yield channel_name, record.get('video')
+
+
+def read_stage_channels(path: str) -> List[Dict]:
+    """Read a whole stage file into the nested list-of-channels layout"""
+    channels = []
+    for channel_name, video in iter_stage_records(path):
+        if video is None:
+            channels.append({'channel_name': channel_name, 'videos': []})
+        else:
+            channels[-1]['videos'].append(video)
+    return channels
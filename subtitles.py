@@ -0,0 +1,42 @@
+from typing import Dict, List, Optional
+import config
+
+
+def select_subtitle_url(info: Dict) -> Optional[str]:
+    """
+    URL of the automatic English VTT captions of a yt-dlp info dict
+
+    Languages are tried in SUBTITLE_LANGS order, like yt-dlp's writeautomaticsub.
+
+    Args:
+        info (Dict): Full (not flat) yt-dlp info dict of a video
+
+    Returns:
+        Optional[str]: Caption URL, or None if the video has no matching captions
+    """
+    captions = info.get('automatic_captions') or {}
+    for lang in config.SUBTITLE_LANGS:
+        for subtitle in captions.get(lang) or []:
+            if subtitle.get('ext') == 'vtt' and subtitle.get('url'):
+                return subtitle['url']
+    return None
+
+
+def caption_metadata(info: Dict) -> Dict:
+    """
+    The parts of a video's info dict the transcript stage needs
+
+    Args:
+        info (Dict): Full yt-dlp info dict of a video
+
+    Returns:
+        Dict: chapters (title and start_time) and subtitle_url
+    """
+    chapters: List[Dict] = [
+        {'title': chapter.get('title'), 'start_time': chapter.get('start_time', 0)}
+        for chapter in info.get('chapters') or []
+    ]
+    return {
+        'chapters': chapters,
+        'subtitle_url': select_subtitle_url(info)
+    }
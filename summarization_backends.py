@@ -0,0 +1,249 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Optional
+import threading, config
+from ollama_client import AsyncOllamaClient, OllamaClient
+from metrics import increment
+
+
+class SummarizationBackend(ABC):
+    """
+    A model server summarization prompts are sent to
+
+    At most max_concurrency requests run on a backend at once; further
+    callers wait for a free slot. Subclasses implement generate; the
+    async pipeline calls generate_async, which by default runs generate
+    on a worker thread.
+    """
+
+    def __init__(self, name: str, model: str, max_concurrency: int = 1):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+            model (str): Model the prompts are run through
+            max_concurrency (int): Requests the backend serves at once
+        """
+        self.name = name
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.pending = 0  # Requests running or waiting for a slot, maintained by BackendRouter
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.async_slots = None  # asyncio.Semaphore, created on the event loop by BackendRouter
+
+    @abstractmethod
+    def generate(
+        self, prompt: str, stream: bool = False, on_token: Optional[Callable[[str], None]] = None, **options
+    ) -> Dict:
+        """
+        Run a prompt through the model
+
+        Args:
+            prompt (str): Prompt text
+            stream (bool): Stream the generation instead of waiting for the full response
+            on_token (Optional[Callable[[str], None]]): Called with every streamed piece of text
+            **options: Backend-specific request fields, e.g. format="json"
+
+        Returns:
+            Dict: Response with the generated text under 'response'
+        """
+
+    async def generate_async(
+        self, prompt: str, stream: bool = False, on_token: Optional[Callable[[str], None]] = None, **options
+    ) -> Dict:
+        """generate for the event loop, without blocking it"""
+        import asyncio  # Only the async pipeline calls this; keep it off the other stages' imports
+
+        return await asyncio.to_thread(self.generate, prompt, stream=stream, on_token=on_token, **options)
+
+    def timings(self, result: Dict) -> Dict[str, float]:
+        """Timing details of a response for the debug log"""
+        return {}
+
+    def close(self) -> None:
+        """Release connections held by the backend"""
+
+    async def close_async(self) -> None:
+        """Release connections opened by generate_async"""
+
+
+class OllamaBackend(SummarizationBackend):
+    """One Ollama instance serving one model"""
+
+    def __init__(self, name: str, model: str, url: str, max_concurrency: int = 1):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+            model (str): Ollama model name
+            url (str): The instance's generate endpoint
+            max_concurrency (int): Requests in flight at once; match the instance's OLLAMA_NUM_PARALLEL
+        """
+        super().__init__(name, model, max_concurrency)
+        self.url = url
+        self.client = OllamaClient(url, pool_size=self.max_concurrency)
+        self.async_client: Optional[AsyncOllamaClient] = None
+
+    def generate(
+        self, prompt: str, stream: bool = False, on_token: Optional[Callable[[str], None]] = None, **options
+    ) -> Dict:
+        return self.client.generate(self.model, prompt, stream=stream, on_token=on_token, **options)
+
+    async def generate_async(
+        self, prompt: str, stream: bool = False, on_token: Optional[Callable[[str], None]] = None, **options
+    ) -> Dict:
+        # The aiohttp session belongs to the running loop, so it is opened on first use
+        if self.async_client is None:
+            self.async_client = AsyncOllamaClient(self.url, pool_size=self.max_concurrency)
+        return await self.async_client.generate(self.model, prompt, stream=stream, on_token=on_token, **options)
+
+    def timings(self, result: Dict) -> Dict[str, float]:
+        return self.client.timings(result)
+
+    def close(self) -> None:
+        self.client.close()
+
+    async def close_async(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+
+class BackendTier(NamedTuple):
+    """Interchangeable backends running the same model"""
+    name: str
+    model: str
+    max_tokens: Optional[int]  # Longest prompt the tier takes, None for no limit
+    backends: List[SummarizationBackend]
+
+
+class BackendRouter:
+    """
+    Routes each prompt to a backend by its length
+
+    A prompt goes to the tier with the smallest max_tokens that still fits
+    it, so short chapters are summarized by a small, fast model and long
+    chunks by the large one. Within a tier the backend with the fewest
+    pending requests is chosen, which spreads the load over every listed
+    instance. Prompts are only tokenized when there is more than one tier.
+    """
+
+    def __init__(self, tiers: List[BackendTier], count_tokens: Callable[[str], int]):
+        """
+        Args:
+            tiers (List[BackendTier]): Tiers in any order
+            count_tokens (Callable[[str], int]): Token count of a prompt
+        """
+        self.tiers = sorted(tiers, key=lambda tier: float('inf') if tier.max_tokens is None else tier.max_tokens)
+        self.count_tokens = count_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def backends(self) -> List[SummarizationBackend]:
+        return [backend for tier in self.tiers for backend in tier.backends]
+
+    @property
+    def max_concurrency(self) -> int:
+        """Requests all backends together serve at once"""
+        return sum(backend.max_concurrency for backend in self.backends)
+
+    def tier_for(self, prompt: str) -> BackendTier:
+        """Smallest tier that fits the prompt; the last tier takes prompts longer than every limit"""
+        if len(self.tiers) == 1:
+            return self.tiers[0]
+
+        tokens = self.count_tokens(prompt)
+        for tier in self.tiers:
+            if tier.max_tokens is None or tokens <= tier.max_tokens:
+                return tier
+        return self.tiers[-1]
+
+    @contextmanager
+    def acquire(self, tier: BackendTier) -> Iterator[SummarizationBackend]:
+        """
+        Reserve a slot on the least busy backend of a tier
+
+        Blocks while that backend is at max_concurrency.
+
+        Yields:
+            SummarizationBackend: The backend to send the request to
+        """
+        with self._lock:
+            backend = min(tier.backends, key=lambda candidate: candidate.pending)
+            backend.pending += 1
+
+        try:
+            with backend.slots:
+                increment(f"backend.{backend.name}.requests")
+                yield backend
+        finally:
+            with self._lock:
+                backend.pending -= 1
+
+    @asynccontextmanager
+    async def acquire_async(self, tier: BackendTier) -> AsyncIterator[SummarizationBackend]:
+        """acquire for the event loop: waits for a slot without blocking the loop"""
+        import asyncio  # Only the async pipeline waits here; keep it off the other stages' imports
+
+        with self._lock:
+            backend = min(tier.backends, key=lambda candidate: candidate.pending)
+            backend.pending += 1
+            if backend.async_slots is None:
+                backend.async_slots = asyncio.Semaphore(backend.max_concurrency)
+
+        try:
+            async with backend.async_slots:
+                increment(f"backend.{backend.name}.requests")
+                yield backend
+        finally:
+            with self._lock:
+                backend.pending -= 1
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.close()
+
+    async def close_async(self) -> None:
+        """Close the connections of the async clients and forget their event loop"""
+        for backend in self.backends:
+            await backend.close_async()
+            backend.async_slots = None
+
+
+def build_backend_router(count_tokens: Callable[[str], int]) -> BackendRouter:
+    """
+    Router for the backends listed in SUMMARIZATION_BACKENDS
+
+    Without any listed, OLLAMA_MODEL at OLLAMA_URL is the single backend,
+    serving SUMMARIZE_MAX_IN_FLIGHT requests at once.
+
+    Args:
+        count_tokens (Callable[[str], int]): Token count of a prompt
+
+    Returns:
+        BackendRouter: Router over one OllamaBackend per listed URL
+    """
+    specs = config.SUMMARIZATION_BACKENDS or [{
+        'name': 'default',
+        'model': config.OLLAMA_MODEL,
+        'urls': [config.OLLAMA_URL],
+        'max_concurrency': config.SUMMARIZE_MAX_IN_FLIGHT
+    }]
+
+    tiers = []
+    for spec in specs:
+        name = spec.get('name') or spec['model']
+        urls = spec.get('urls') or [spec.get('url') or config.OLLAMA_URL]
+        tiers.append(BackendTier(
+            name=name,
+            model=spec['model'],
+            max_tokens=spec.get('max_tokens'),
+            backends=[
+                OllamaBackend(
+                    name if len(urls) == 1 else f"{name}.{i}",
+                    spec['model'],
+                    url,
+                    spec.get('max_concurrency', 1)
+                )
+                for i, url in enumerate(urls)
+            ]
+        ))
+    return BackendRouter(tiers, count_tokens)
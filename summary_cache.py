@@ -0,0 +1,117 @@
+from typing import Dict, Optional
+import os, json, time, sqlite3, hashlib, threading, config
+
+
+class SummaryCache:
+    """
+    Persistent cache of LLM responses keyed by a hash of model, prompt template and inputs
+
+    Entries are evicted least-recently-used first once the cache holds more
+    than max_entries responses.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Open (and create if needed) the cache database
+
+        Args:
+            path (Optional[str]): SQLite file, defaults to config.SUMMARY_CACHE_FILE
+            max_entries (Optional[int]): Size bound, defaults to config.SUMMARY_CACHE_MAX_ENTRIES
+        """
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.path = path or self.config.SUMMARY_CACHE_FILE
+        self.max_entries = max_entries or self.config.SUMMARY_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS summaries (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)"
+            )
+
+    @staticmethod
+    def make_key(model: str, template: str, fields: Dict[str, str]) -> str:
+        """
+        Content address of a prompt
+
+        Args:
+            model (str): Model name
+            template (str): Prompt template before formatting
+            fields (Dict[str, str]): Values substituted into the template
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        for part in (model, template, json.dumps(fields, sort_keys=True, ensure_ascii=False)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None on a miss"""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT response FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._connection.execute(
+                "UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response and evict the least recently used entries beyond max_entries"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO summaries (key, response, last_used) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self._connection.execute(
+                """DELETE FROM summaries WHERE key IN (
+                    SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters of this process and the current number of entries"""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+
+def open_summary_cache() -> Optional[SummaryCache]:
+    """Open the shared summary cache, or return None when SUMMARY_CACHE_ENABLED is disabled"""
+    if not config.SUMMARY_CACHE_ENABLED:
+        return None
+
+    try:
+        return SummaryCache()
+    except sqlite3.Error as e:
+        config.LOGGER.error(f"Could not open summary cache {config.SUMMARY_CACHE_FILE}: {e}")
+        return None
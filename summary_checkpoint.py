@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional, Tuple
+import os, json, time, hashlib, threading, config
+
+
+def chunk_key(text: str) -> str:
+    """Content address of a transcript chunk"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SummaryCheckpoint:
+    """
+    Partial summarization results of the current run, saved periodically
+
+    For every video it keeps the summaries of finished chunks (keyed by a hash
+    of the chunk text, so a changed chunking just misses) and the progress of
+    the running description. The file is rewritten atomically at most every
+    SUMMARY_CHECKPOINT_INTERVAL seconds and on save(), so a crashed run can be
+    resumed with only the unfinished chunks sent to Ollama again.
+    """
+
+    def __init__(self, path: Optional[str] = None, interval: Optional[float] = None):
+        """
+        Load the checkpoint file if there is one
+
+        Args:
+            path (Optional[str]): JSON file, defaults to config.SUMMARY_CHECKPOINT_FILE
+            interval (Optional[float]): Minimum seconds between writes, defaults to
+                config.SUMMARY_CHECKPOINT_INTERVAL
+        """
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.path = path or self.config.SUMMARY_CHECKPOINT_FILE
+        self.interval = self.config.SUMMARY_CHECKPOINT_INTERVAL if interval is None else interval
+
+        self._lock = threading.Lock()
+        self._videos: Dict[str, Dict] = self._load()
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                videos = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable summary checkpoint {self.path}: {e}")
+            return {}
+
+        self.logger.info(f"Loaded summary checkpoint with {len(videos)} videos from {self.path}")
+        return videos
+
+    def _video(self, video_id: str) -> Dict:
+        return self._videos.setdefault(video_id, {'chunks': {}, 'description': None})
+
+    def chunk_summary(self, video_id: str, chunk: str) -> Optional[str]:
+        """Checkpointed summary of a chunk, or None if it still has to be summarized"""
+        with self._lock:
+            return self._videos.get(video_id, {}).get('chunks', {}).get(chunk_key(chunk))
+
+    def record_chunk(self, video_id: str, chunk: str, summary: str) -> None:
+        """Remember a chunk summary"""
+        with self._lock:
+            self._video(video_id)['chunks'][chunk_key(chunk)] = summary
+            self._changed()
+
+    def description_progress(self, video_id: str, chunks: List[str]) -> Tuple[int, str]:
+        """
+        Where the running description of a video left off
+
+        Args:
+            video_id (str): Video ID
+            chunks (List[str]): Transcript chunks the description is built from
+
+        Returns:
+            Tuple[int, str]: Number of chunks already folded in and the summary so far
+        """
+        with self._lock:
+            progress = self._videos.get(video_id, {}).get('description')
+
+        if not progress:
+            return 0, ""
+
+        # Only trust the progress if it was made on the same chunks
+        done = progress['chunks']
+        if len(done) > len(chunks) or any(key != chunk_key(chunk) for key, chunk in zip(done, chunks)):
+            return 0, ""
+        return len(done), progress['summary']
+
+    def record_description(self, video_id: str, chunks: List[str], summary: str) -> None:
+        """Remember the running description after folding in chunks"""
+        with self._lock:
+            self._video(video_id)['description'] = {
+                'chunks': [chunk_key(chunk) for chunk in chunks],
+                'summary': summary
+            }
+            self._changed()
+
+    def _changed(self) -> None:
+        """Mark the checkpoint dirty and write it if the interval has passed (lock held)"""
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.interval:
+            self._write()
+
+    def save(self) -> None:
+        """Write the checkpoint if anything changed since the last write"""
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def _write(self) -> None:
+        """Replace the checkpoint file atomically (lock held)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temporary_path = f"{self.path}.tmp"
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as f:
+                json.dump(self._videos, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            self.logger.error(f"Could not write summary checkpoint {self.path}: {e}")
+            return
+
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+
+def open_summary_checkpoint() -> Optional[SummaryCheckpoint]:
+    """Open the summary checkpoint, or return None when SUMMARY_CHECKPOINT_ENABLED is disabled"""
+    if not config.SUMMARY_CHECKPOINT_ENABLED:
+        return None
+    return SummaryCheckpoint()
@@ -1,27 +1,273 @@
-from typing import List, Dict, Optional
-import os, json, config, requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+import json, os, config, requests
 from tqdm import tqdm
 import os,tiktoken,re
-import time
+from video_index import STAGE_SUMMARIZED, open_video_index
+from summary_cache import open_summary_cache
+from summary_checkpoint import open_summary_checkpoint
+from rate_limiter import retry_after_seconds, shared_rate_limiter
+from concurrency import imap_ordered
+from stage_io import StageWriter, iter_stage_records, stage_file_exists, stage_path
+from summarization_backends import BackendTier, SummarizationBackend, build_backend_router
+from metrics import increment, timed
+
+
+# Control characters stripped before tokenization
+CONTROL_CHARACTERS = re.compile(r'[\x00-\x1F\x7F-\x9F]')
+
+SENTENCE_ENDINGS = (b'.', b'!', b'?')
+
+
+@lru_cache(maxsize=None)
+def get_encoder() -> tiktoken.Encoding:
+    """Shared tokenizer (using cl100k_base which is compatible with most modern models)"""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    with timed("tokenize"):
+        return len(get_encoder().encode(text))
+
+
+@lru_cache(maxsize=None)
+def ends_sentence(token: int) -> bool:
+    """Whether a token ends with sentence punctuation"""
+    return get_encoder().decode_single_token_bytes(token).rstrip().endswith(SENTENCE_ENDINGS)
+
+
+CHUNK_PROMPT = """Summarize the following YouTube video transcript concisely in  points. 
+                Specific requirements:\n
+                    --IMPORTANT:
+                - Maximum 3 lines\n
+                - Be very short and concise\n
+                - Do not miss any important details\n
+                - Focus only on the key information of what the video discusses\n
+                - Exclude any personal details about the narrator\n"
+                - Remove repeated phrases and unnecessary details\n
+                - Use precise, information-dense language\n\n
+                Content: {text}"""
+
+PACKED_CHAPTERS_PROMPT = """Summarize each of the following numbered chapters of a YouTube video transcript concisely in  points. 
+                Specific requirements:\n
+                    --IMPORTANT:
+                - Maximum 3 lines per chapter\n
+                - Be very short and concise\n
+                - Do not miss any important details\n
+                - Focus only on the key information of what each chapter discusses\n
+                - Exclude any personal details about the narrator\n
+                - Remove repeated phrases and unnecessary details\n
+                - Use precise, information-dense language\n
+                - Answer with a JSON object only, mapping every chapter number to its summary,
+                  e.g. {{"1": "summary of chapter 1", "2": "summary of chapter 2"}}\n\n
+                {chapters}"""
+
+# Heading of every chapter in PACKED_CHAPTERS_PROMPT
+PACKED_CHAPTER_HEADING = "### Chapter {number}: {title}"
+
+# Guidelines and output format shared by the running (DESCRIPTION_PROMPT) and
+# tree (MERGE_PROMPT) descriptions
+DESCRIPTION_GUIDELINES = """Summarization Guidelines:
+                                    --IMPORTANT:
+                                        - Create a maximum of 5  lines .
+                                - Be extremely concise yet comprehensive
+                                - Capture the video's core essence
+                                - Ensure no critical information is missed
+                                - Focus on main purpose and key topics
+                                - Prioritize factual, content-driven summary
+                                - Eliminate repetitive or unnecessary details
+
+                                Objective: Craft a summary that provides a understanding of the video's content in just a glance."""
+
+DESCRIPTION_OUTPUT_FORMAT = """Output Format: Numbered points(very short in length), information-dense, zero fluff."""
+
+DESCRIPTION_PROMPT = """You are summarizing a YouTube video by analyzing it in chunks. 
+                                """ + DESCRIPTION_GUIDELINES + """
+
+                                ###Previously generated combined summary of the chunks summarized so far:
+
+                                {running_summary}
+
+                                ### New Transcript Chunk:
+                                {transcript}
+
+                                """ + DESCRIPTION_OUTPUT_FORMAT
+
+MERGE_PROMPT = """You are summarizing a YouTube video from summaries of its parts. 
+                                """ + DESCRIPTION_GUIDELINES + """
+
+                                ### Summaries of consecutive parts of the video:
+
+                                {summaries}
+
+                                """ + DESCRIPTION_OUTPUT_FORMAT
+
+
+def parse_packed_summaries(response: str, count: int) -> Dict[int, str]:
+    """
+    Per-chapter summaries from the JSON answer to a PACKED_CHAPTERS_PROMPT
+
+    Text around the JSON object is ignored, and list values are joined line
+    by line. Chapters that are missing, empty or out of range are left out.
+
+    Args:
+        response (str): Model response
+        count (int): Number of chapters in the prompt
+
+    Returns:
+        Dict[int, str]: Summaries by position of the chapter in the prompt (from 0)
+    """
+    start, end = response.find('{'), response.rfind('}')
+    if start < 0 or end < start:
+        return {}
+    try:
+        answer = json.loads(response[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(answer, dict):
+        return {}
+
+    summaries = {}
+    for key, value in answer.items():
+        try:
+            position = int(str(key).strip().rstrip('.')) - 1
+        except ValueError:
+            continue
+        if isinstance(value, list):
+            value = '\n'.join(str(item) for item in value)
+        if 0 <= position < count and isinstance(value, str) and value.strip():
+            summaries[position] = value.strip()
+    return summaries
+
+
+def format_packed_chapters(chapters: List[Tuple[str, str]]) -> str:
+    """Numbered chapter sections of a PACKED_CHAPTERS_PROMPT"""
+    return "\n\n".join(
+        PACKED_CHAPTER_HEADING.format(number=number, title=title) + "\n" + text
+        for number, (title, text) in enumerate(chapters, start=1)
+    )
+
+
+def split_future(future: Future, count: int) -> List[Future]:
+    """Futures for the items of the list another future resolves to"""
+    parts = [Future() for _ in range(count)]
+
+    def resolve(done: Future):
+        error = done.exception()
+        for position, part in enumerate(parts):
+            if error is not None:
+                part.set_exception(error)
+            else:
+                part.set_result(done.result()[position])
+
+    future.add_done_callback(resolve)
+    return parts
+
 
 class TranscriptSummarizer:
 
-    def __init__(self):
+    def __init__(self, on_token: Optional[Callable[[str], None]] = None):
         """
         Initialize summarizer with configuration
         
         Args:
-            ollama_url (str): URL for Ollama API
+            on_token (Optional[Callable[[str], None]]): Called with generated text as it
+                streams in, when OLLAMA_STREAM is enabled
         """
         self.config = config
-        self.ollama_url = self.config.OLLAMA_URL
         self.logger = self.config.LOGGER 
-        self.model=self.config.OLLAMA_MODEL
+        self.backends = build_backend_router(count_tokens)
+        self.index = open_video_index()
+        self.cache = open_summary_cache()
+        self.checkpoint = open_summary_checkpoint()
+        self.rate_limiter = shared_rate_limiter()
+
+        # Enough workers to keep every backend slot busy; each backend bounds its own requests
+        self.max_in_flight = max(1, self.backends.max_concurrency)
+        self._chunk_pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="summarize-chunk")
+
+        self.on_token = on_token
 
 
    
     
 
+    def _generate(self, template: str, response_format: Optional[str] = None, **fields) -> str:
+        """
+        Run a prompt through the backend its length is routed to, answering
+        from the summary cache when possible
+
+        Args:
+            template (str): Prompt template
+            response_format (Optional[str]): Output format the model is held to, e.g. "json"
+            **fields: Values substituted into the template
+
+        Returns:
+            str: The model response
+        """
+        prompt, tier, key, cached = self._prepare_prompt(template, fields)
+        if cached is not None:
+            return cached
+
+        # Retry while the backend asks us to slow down (429/503)
+        with self.backends.acquire(tier) as backend:
+            for attempt in range(self.config.OLLAMA_MAX_RETRIES + 1):
+                self.rate_limiter.acquire()
+                try:
+                    options = {'format': response_format} if response_format else {}
+                    response = backend.generate(
+                        prompt, stream=self.config.OLLAMA_STREAM, on_token=self.on_token, **options
+                    )
+                except requests.HTTPError as e:
+                    if e.response is None or not self._should_retry(
+                        e.response.status_code, e.response.headers.get('Retry-After'), attempt
+                    ):
+                        raise
+                    continue
+
+                self.rate_limiter.report(200)
+                break
+
+        return self._response_text(key, backend, response)
+
+    def _prepare_prompt(
+        self, template: str, fields: Dict
+    ) -> Tuple[str, BackendTier, Optional[str], Optional[str]]:
+        """
+        Fill in a prompt, route it and look it up in the summary cache
+
+        Returns:
+            Tuple[str, BackendTier, Optional[str], Optional[str]]: The prompt, the tier it is
+                routed to, its cache key and the cached response (None when not cached)
+        """
+        prompt = template.format(**fields)
+        tier = self.backends.tier_for(prompt)
+
+        if not self.cache:
+            return prompt, tier, None, None
+        key = self.cache.make_key(tier.model, template, fields)
+        return prompt, tier, key, self.cache.get(key)
+
+    def _should_retry(self, status_code: Optional[int], retry_after: Optional[str], attempt: int) -> bool:
+        """Report a failed call to the rate limiter and decide whether to try again"""
+        retry = self.rate_limiter.report(status_code, retry_after_seconds(retry_after))
+        if not retry or attempt == self.config.OLLAMA_MAX_RETRIES:
+            return False
+        self.logger.warning(f"Ollama returned {status_code}, retrying")
+        return True
+
+    def _response_text(self, key: Optional[str], backend: SummarizationBackend, response: Dict) -> str:
+        """Text of a backend response, stored in the summary cache"""
+        self.logger.debug(f"{backend.name} timings: {backend.timings(response)}")
+
+        result = response.get('response', '')
+        if self.cache and result:
+            self.cache.put(key, result)
+        return result
+
+    @timed("summarize.chunk")
     def summarize_chunk(self, text):
         """
         Summarizes input text using Groq API with specific formatting requirements.
@@ -34,82 +280,222 @@ class TranscriptSummarizer:
         """
         # Set your Groq API key
         try:
-            
-            payload = {
-                "model": self.model,
-                "prompt":  f"""Summarize the following YouTube video transcript concisely in  points. 
-                Specific requirements:\n
-                    --IMPORTANT:
-                - Maximum 3 lines\n
-                - Be very short and concise\n
-                - Do not miss any important details\n
-                - Focus only on the key information of what the video discusses\n
-                - Exclude any personal details about the narrator\n"
-                - Remove repeated phrases and unnecessary details\n
-                - Use precise, information-dense language\n\n
-                Content: {text}""",
-                "stream": False,
-            }
-            
-            response = requests.post(self.ollama_url, json=payload)
-            response.raise_for_status()
-            
-            return response.json().get('response', '')
+            return self._generate(CHUNK_PROMPT, text=text)
         
         except Exception as e:
             self.logger.error(f"Summarization error: {e}")
             return ""
 
-    def summarize_video_description(self, transcripts: List[str]) -> str:
+    def _summarize_chunk_checkpointed(self, video_id: Optional[str], chunk: str) -> str:
+        """Summarize a chunk unless the checkpoint already has its summary"""
+        if not self.checkpoint or not video_id:
+            return self.summarize_chunk(chunk)
+
+        summary = self.checkpoint.chunk_summary(video_id, chunk)
+        if summary is None:
+            summary = self.summarize_chunk(chunk)
+            if summary:
+                self.checkpoint.record_chunk(video_id, chunk, summary)
+        return summary
+
+    @timed("summarize.pack")
+    def _summarize_pack(self, video_id: Optional[str], chapters: List[Tuple[str, str]]) -> List[str]:
+        """
+        Summarize several short chapters with a single LLM call
+
+        The model answers with a JSON object keyed by chapter number; every
+        chapter missing from a usable answer is summarized on its own instead.
+
+        Args:
+            video_id (Optional[str]): Video the chapters belong to, for the checkpoint
+            chapters (List[Tuple[str, str]]): Chapter titles and texts, in video order
+
+        Returns:
+            List[str]: Summary of every chapter, in the same order
+        """
+        try:
+            response = self._generate(
+                PACKED_CHAPTERS_PROMPT, response_format="json", chapters=format_packed_chapters(chapters)
+            )
+        except Exception as e:
+            self.logger.error(f"Packed summarization error: {e}")
+            response = ""
+
+        summaries = self._unpack_summaries(video_id, chapters, response)
+        return [
+            summary if summary is not None else self._summarize_chunk_checkpointed(video_id, text)
+            for summary, (_, text) in zip(summaries, chapters)
+        ]
+
+    def _unpack_summaries(
+        self, video_id: Optional[str], chapters: List[Tuple[str, str]], response: str
+    ) -> List[Optional[str]]:
+        """Per-chapter summaries of a packed response, checkpointed; None for chapters it lacks"""
+        packed = parse_packed_summaries(response, len(chapters))
+        increment("summarize.packed_chapters", len(packed))
+        increment("summarize.pack_fallbacks", len(chapters) - len(packed))
+
+        if self.checkpoint and video_id:
+            for position, summary in packed.items():
+                self.checkpoint.record_chunk(video_id, chapters[position][1], summary)
+        return [packed.get(position) for position in range(len(chapters))]
+
+    def _submit_chapters(
+        self, video_id: Optional[str], chapter_chunks: List[Tuple[str, List[str]]]
+    ) -> List[List[Future]]:
+        """
+        Start summarizing the chunks of every chapter on the chunk pool
+
+        With CHAPTER_PACKING, runs of adjacent single-chunk chapters share
+        one request for up to CHAPTER_PACK_MAX_TOKENS tokens of text and
+        CHAPTER_PACK_MAX_CHAPTERS chapters. Chapters the checkpoint already
+        covers are not packed.
+
+        Args:
+            video_id (Optional[str]): Video the chapters belong to
+            chapter_chunks (List[Tuple[str, List[str]]]): Chapter titles and their chunks
+
+        Returns:
+            List[List[Future]]: Futures of every chapter's chunk summaries
+        """
+        submit = lambda chunk: self._chunk_pool.submit(self._summarize_chunk_checkpointed, video_id, chunk)
+
+        futures: List[List[Future]] = []
+        for group in self._chapter_groups(video_id, chapter_chunks):
+            if len(group) == 1:
+                futures.append([submit(chunk) for chunk in chapter_chunks[group[0]][1]])
+                continue
+
+            chapters = [(chapter_chunks[position][0], chapter_chunks[position][1][0]) for position in group]
+            pack_future = self._chunk_pool.submit(self._summarize_pack, video_id, chapters)
+            futures.extend([part] for part in split_future(pack_future, len(group)))
+        return futures
+
+    def _chapter_groups(
+        self, video_id: Optional[str], chapter_chunks: List[Tuple[str, List[str]]]
+    ) -> List[List[int]]:
+        """
+        Positions of the chapters summarized together, in video order
+
+        Without CHAPTER_PACKING every chapter is a group of its own.
+        Otherwise runs of adjacent single-chunk chapters are packed up to
+        CHAPTER_PACK_MAX_TOKENS tokens and CHAPTER_PACK_MAX_CHAPTERS
+        chapters; chapters the checkpoint already covers stay on their own.
+        """
+        if not self.config.CHAPTER_PACKING:
+            return [[position] for position in range(len(chapter_chunks))]
+
+        def checkpointed(chunk):
+            return bool(self.checkpoint and video_id) and self.checkpoint.chunk_summary(video_id, chunk) is not None
+
+        groups: List[List[int]] = []
+        pack: List[int] = []
+        pack_tokens = 0
+        for position, (_, chunks) in enumerate(chapter_chunks):
+            tokens = count_tokens(chunks[0]) if len(chunks) == 1 else None
+            if tokens is None or tokens > self.config.CHAPTER_PACK_MAX_TOKENS or checkpointed(chunks[0]):
+                if pack:
+                    groups.append(pack)
+                    pack = []
+                groups.append([position])
+                continue
+
+            if pack and (
+                pack_tokens + tokens > self.config.CHAPTER_PACK_MAX_TOKENS
+                or len(pack) >= self.config.CHAPTER_PACK_MAX_CHAPTERS
+            ):
+                groups.append(pack)
+                pack = []
+            if not pack:
+                pack_tokens = 0
+            pack.append(position)
+            pack_tokens += tokens
+
+        if pack:
+            groups.append(pack)
+        return groups
+
+    def summarize_video_description(self, transcripts: List[str], video_id: Optional[str] = None) -> str:
         """
         Generate overall video description with context accumulation
         
         Args:
             transcripts (List[str]): Transcript chunks
+            video_id (Optional[str]): Video the chunks belong to; when given, progress is
+                checkpointed and resumed from the first chunk not folded in yet
         
         Returns:
             str: Comprehensive video description
         """
-        running_summary = ""
+        start, running_summary = 0, ""
+        checkpointed = self.checkpoint is not None and video_id is not None
+        if checkpointed:
+            start, running_summary = self.checkpoint.description_progress(video_id, transcripts)
         
-        for i, transcript in enumerate(tqdm(transcripts)):
+        for i, transcript in enumerate(
+            tqdm(transcripts[start:], disable=self.max_in_flight > 1), start=start
+        ):
             try:
-                payload = {
-                    "model": self.model,
-                    "prompt":f"""You are summarizing a YouTube video by analyzing it in chunks. 
-                                Summarization Guidelines:
-                                    --IMPORTANT:
-                                        - Create a maximum of 5  lines .
-                                - Be extremely concise yet comprehensive
-                                - Capture the video's core essence
-                                - Ensure no critical information is missed
-                                - Focus on main purpose and key topics
-                                - Prioritize factual, content-driven summary
-                                - Eliminate repetitive or unnecessary details
-
-                                Objective: Craft a summary that provides a understanding of the video's content in just a glance.
-
-                                ###Previously generated combined summary of the chunks summarized so far:
-
-                                {running_summary}
-
-                                ### New Transcript Chunk:
-                                {transcript}
-
-                                Output Format: Numbered points(very short in length), information-dense, zero fluff.""",
-                    "stream": False
-                }
-                
-                response = requests.post(self.ollama_url, json=payload)
-                response.raise_for_status()
-                
-                running_summary = response.json().get('response', '')
+                running_summary = self._generate(
+                    DESCRIPTION_PROMPT,
+                    running_summary=running_summary,
+                    transcript=transcript
+                )
             
             except Exception as e:
                 self.logger.error(f"Description generation error at chunk {i}: {e}")
+                continue
+
+            if checkpointed and running_summary:
+                self.checkpoint.record_description(video_id, transcripts[:i + 1], running_summary)
         
         return running_summary
 
+    def summarize_video_description_tree(self, summaries: List[str]) -> str:
+        """
+        Generate overall video description by merging existing summaries level by level
+
+        Groups of DESCRIPTION_REDUCE_FANOUT summaries are merged concurrently,
+        so a video with n parts needs about log(n) rounds of LLM calls instead
+        of n sequential ones over the raw transcript.
+
+        Args:
+            summaries (List[str]): Chapter or chunk summaries in video order
+        
+        Returns:
+            str: Comprehensive video description, empty if any merge failed
+        """
+        level = [summary for summary in summaries if summary]
+        if not level:
+            return ""
+
+        fanout = max(2, self.config.DESCRIPTION_REDUCE_FANOUT)
+        merged_once = False
+
+        # Keep merging until a single summary is left; always merge at least
+        # once so the description gets its final format.
+        while len(level) > 1 or not merged_once:
+            groups = [level[i:i + fanout] for i in range(0, len(level), fanout)]
+            futures = [self._chunk_pool.submit(self._merge_summaries, group) for group in groups]
+            level = [future.result() for future in futures]
+            merged_once = True
+
+            # A failed merge would silently drop its chapters from the description;
+            # return none so the video stays incomplete and is retried next run
+            if not all(level):
+                return ""
+
+        return level[0]
+
+    def _merge_summaries(self, summaries: List[str]) -> str:
+        """Merge consecutive summaries into one"""
+        try:
+            return self._generate(MERGE_PROMPT, summaries="\n\n".join(summaries))
+
+        except Exception as e:
+            self.logger.error(f"Description merge error: {e}")
+            return ""
+
     def process_channels(self) -> Optional[List[Dict]]:
         """
         Process YouTube channel transcripts
@@ -119,61 +505,137 @@ class TranscriptSummarizer:
             output_file (str): Output JSON file path
         
         Returns:
-            Optional[List[Dict]]: Processed channel data
+            Optional[List[Dict]]: Processed channel data in "json" format, None in "jsonl" format
+                or if the input file is missing
         """
         # Validate input file
-        if not os.path.exists(self.config.VIDEO_TRANSCRIPT_FILE):
-            self.logger.error(f"Input file not found: {self.config.VIDEO_TRANSCRIPT_FILE}")
+        if not stage_file_exists(self.config.VIDEO_TRANSCRIPT_FILE):
+            self.logger.error(f"Input file not found: {stage_path(self.config.VIDEO_TRANSCRIPT_FILE)}")
             return None
 
-        with open(self.config.VIDEO_TRANSCRIPT_FILE, 'r', encoding='utf-8') as f:
-            channels_data = json.load(f)
-        
-        for channel in channels_data:
-            if channel['videos']:
-                for video in channel['videos']:
-                    if 'transcript_data' in video:
-                        # Chapter-level summarization
-                        chapter_summaries = {}
-                        video_summary_chunks = []
-                        
-                        for chapter, content in tqdm(video['transcript_data'].items()):
-                            # Split long chapters into chunks
-                            chunks = self.split_text_into_chunks(content)
-                            
-                            # Summarize chapter chunks independently
-                            chapter_summary = []
-                            for chunk in chunks:
-                                
-                                chunk_summary = self.summarize_chunk(chunk)
-                                time.sleep(20)
-                                chapter_summary.append(chunk_summary)
-                                video_summary_chunks.append(chunk)
-                               
-
-                            
-                            # Combine chapter summaries
-                            final_chapter_summary = " ".join(chapter_summary)
-                            chapter_summaries[chapter] = final_chapter_summary
-                            
-                        
-                        # Store chapter summaries
-                        video['chapter_summaries'] = chapter_summaries
-                        
-                        # Generate overall video description
-                        video['description'] = self.summarize_video_description(video_summary_chunks)
-                        
-                        # Remove original transcript data
-                        del video['transcript_data']
+        records = iter_stage_records(self.config.VIDEO_TRANSCRIPT_FILE)
+
+        def summarize_record(record):
+            _, video = record
+            return self.summarize_video(video) if video is not None else None
+
+        # Videos are summarized concurrently and written back in input order
+        results = imap_ordered(summarize_record, records, max_workers=self.max_in_flight, name="summarize")
         
-        # Write processed data
-        with open(self.config.SUMMARIZED_TRANSCRIPT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(channels_data, f, indent=4, ensure_ascii=False)
+        # Write processed data; whatever finished is checkpointed even if a video fails
+        try:
+            with StageWriter(self.config.SUMMARIZED_TRANSCRIPT_FILE) as writer:
+                for (channel_name, video), summarized in results:
+                    writer.write(channel_name, summarized or video)
+        finally:
+            self.save_checkpoint()
         
-        self.logger.info(f"Processed data saved to {self.config.SUMMARIZED_TRANSCRIPT_FILE}")
-        return channels_data
+        self.logger.info(f"Processed data saved to {writer.path}")
+        self.log_stats()
+        return writer.channels
+
+    def save_checkpoint(self) -> None:
+        """Write pending checkpoint updates now"""
+        if self.checkpoint:
+            self.checkpoint.save()
+
+    def log_stats(self) -> None:
+        """Log summary cache and rate limiter statistics of the run"""
+        if self.cache:
+            self.logger.info(f"Summary cache: {self.cache.stats()}")
+        self.logger.info(f"Rate limiter throttled Ollama calls for {self.rate_limiter.throttled_seconds:.1f}s")
+
+    def summarize_video(self, video: Dict) -> Dict:
+        """
+        Summarize one video's chapters and description in place
+
+        Chunks of all chapters are summarized concurrently on the chunk pool
+        (short chapters packed together with CHAPTER_PACKING); results are
+        joined back per chapter in transcript order, so the output matches a
+        serial run.
+
+        Args:
+            video (Dict): Video data with transcript_data
+
+        Returns:
+            Dict: The same video dict with chapter_summaries and description
+        """
+        chapter_chunks = self._chapter_chunks(video)
+        if chapter_chunks is None:
+            return video
+
+        chunk_futures = self._submit_chapters(video.get('id'), chapter_chunks)
+
+        # Chapter-level summarization
+        chapter_summaries = {}
+        video_summary_chunks = []
+
+        for (chapter, chunks), futures in tqdm(
+            list(zip(chapter_chunks, chunk_futures)), disable=self.max_in_flight > 1
+        ):
+            # Combine chapter summaries
+            chapter_summaries[chapter] = " ".join(future.result() for future in futures)
+            video_summary_chunks.extend(chunks)
+
+        # Generate overall video description
+        if self.config.DESCRIPTION_MODE == "tree":
+            description = self.summarize_video_description_tree([
+                f"{chapter}: {summary}" for chapter, summary in chapter_summaries.items() if summary
+            ])
+        else:
+            description = self.summarize_video_description(video_summary_chunks, video.get('id'))
+
+        return self._finish_video(video, chapter_summaries, description)
+
+    def _chapter_chunks(self, video: Dict) -> Optional[List[Tuple[str, List[str]]]]:
+        """
+        Chapters of a video still to be summarized, each split into chunks
 
-    def split_text_into_chunks(self,text: str) -> List[str]:
+        Returns:
+            Optional[List[Tuple[str, List[str]]]]: Chapter titles and chunks, or None when there
+                is nothing to summarize (no transcript, or restored from an earlier run)
+        """
+        stored_summary = self._stored_summary(video)
+        if stored_summary:
+            # Summarized by an earlier run
+            video.update(stored_summary)
+            video.pop('transcript_data', None)
+            return None
+
+        if 'transcript_data' not in video:
+            return None
+
+        # Split long chapters into chunks and summarize them independently
+        return [
+            (chapter, self.split_text_into_chunks(content))
+            for chapter, content in video['transcript_data'].items()
+        ]
+
+    def _finish_video(self, video: Dict, chapter_summaries: Dict[str, str], description: str) -> Dict:
+        """Store a video's summaries in place of its transcript and record complete ones in the index"""
+        video['chapter_summaries'] = chapter_summaries
+        video['description'] = description
+
+        # Remove original transcript data
+        del video['transcript_data']
+
+        # Failed LLM calls return empty summaries; leave those videos for the next run
+        summary_complete = video['description'] and all(chapter_summaries.values())
+        if self.index and video.get('id') and summary_complete:
+            self.index.mark_complete(video['id'], STAGE_SUMMARIZED, {
+                'chapter_summaries': video['chapter_summaries'],
+                'description': video['description']
+            })
+
+        return video
+
+    def _stored_summary(self, video: Dict) -> Optional[Dict]:
+        """Summary an earlier run stored for this video, if any"""
+        if not self.index or not video.get('id'):
+            return None
+        return self.index.payload(video['id'], STAGE_SUMMARIZED)
+
+    def split_text_into_chunks(self, text: str, max_tokens: int = 30000) -> List[str]:
         """
         Split text into chunks based on token count
         
@@ -184,38 +646,65 @@ class TranscriptSummarizer:
         Returns:
             List[str]: List of text chunks, each containing max_tokens or fewer tokens
         """
-        max_tokens=30000
-        # Initialize tokenizer (using cl100k_base which is compatible with most modern models)
-        tokenizer = tiktoken.get_encoding("cl100k_base")
-        text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', str(text))  # Remove control characters
+        return list(self.iter_text_chunks(text, max_tokens))
+
+    def iter_text_chunks(
+        self,
+        text: str,
+        max_tokens: int = 30000,
+        overlap: Optional[int] = None,
+        align_sentences: Optional[bool] = None
+    ) -> Iterator[str]:
+        """
+        Lazily yield chunks of text based on token count
+
+        The text is encoded once and chunk boundaries are slices of the token
+        list, so only the chunk being yielded is decoded.
+
+        Args:
+            text (str): Input text
+            max_tokens (int): Maximum tokens per chunk (default 30000)
+            overlap (Optional[int]): Tokens repeated at the start of the next chunk,
+                defaults to config.CHUNK_OVERLAP_TOKENS
+            align_sentences (Optional[bool]): End chunks after the last sentence break in
+                their second half when there is one, defaults to config.CHUNK_ALIGN_SENTENCES
+
+        Yields:
+            str: Text chunks, each containing max_tokens or fewer tokens
+        """
+        if overlap is None:
+            overlap = self.config.CHUNK_OVERLAP_TOKENS
+        if align_sentences is None:
+            align_sentences = self.config.CHUNK_ALIGN_SENTENCES
+        overlap = min(max(overlap, 0), max_tokens - 1)
+
+        tokenizer = get_encoder()
+        text = CONTROL_CHARACTERS.sub('', str(text))  # Remove control characters
 
         # Get all tokens for the text
-        tokens = tokenizer.encode(text)
-        
-        # Initialize variables for chunking
-        chunks = []
-        current_chunk_tokens = []
-        current_token_count = 0
-        
-        # Process tokens
-        for token in tokens:
-            if current_token_count >= max_tokens:
-                # Convert tokens back to text and add to chunks
-                chunk_text = tokenizer.decode(current_chunk_tokens)
-                chunks.append(chunk_text)
-                # Reset current chunk
-                current_chunk_tokens = []
-                current_token_count = 0
-            
-            current_chunk_tokens.append(token)
-            current_token_count += 1
-        
-        # Add the last chunk if it exists
-        if current_chunk_tokens:
-            chunk_text = tokenizer.decode(current_chunk_tokens)
-            chunks.append(chunk_text)
-        
-        return chunks
+        with timed("tokenize"):
+            tokens = tokenizer.encode(text)
+
+        start = 0
+        while start < len(tokens):
+            end = min(start + max_tokens, len(tokens))
+
+            if align_sentences and end < len(tokens):
+                end = self._sentence_end(tokens, start + max_tokens // 2, end)
+
+            # Convert tokens back to text
+            yield tokenizer.decode(tokens[start:end])
+
+            if end >= len(tokens):
+                break
+            start = max(end - overlap, start + 1)
+
+    def _sentence_end(self, tokens: List[int], lowest: int, end: int) -> int:
+        """Position after the last sentence-ending token in tokens[lowest:end], or end if there is none"""
+        for position in range(end - 1, lowest - 1, -1):
+            if ends_sentence(tokens[position]):
+                return position + 1
+        return end
 
 
 def TranscriptSummarizerProcess():
@@ -1,17 +1,32 @@
+from array import array
+from bisect import bisect_right
 from collections import OrderedDict
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Sequence
 from datetime import datetime, timedelta
-import os, json, pytz, yt_dlp, webvtt, config
+import os, yt_dlp, config
+from video_index import STAGE_TRANSCRIBED, open_video_index
+from subtitles import caption_metadata
+from concurrency import imap_ordered
+from stage_io import StageWriter, iter_stage_records, stage_file_exists, stage_path
+from metrics import timed
+from vtt_parser import parse_vtt
 
 
 
 class YouTubeTranscriptExtractor:
 
-    def __init__(self):
-        """Initialize extractor with configuration"""
+    def __init__(self, ydl_factory: Optional[Callable] = None):
+        """
+        Initialize extractor with configuration
+
+        Args:
+            ydl_factory (Optional[Callable]): Builds a YoutubeDL-like object from an options
+                dict. Defaults to yt_dlp.YoutubeDL; benchmarks pass a local fake.
+        """
         self.config = config
         self.logger = self.config.LOGGER
-        os.makedirs(self.config.VTT_FILES, exist_ok=True)
+        self.index = open_video_index()
+        self.ydl_factory = ydl_factory or yt_dlp.YoutubeDL
 
     def convert_timestamp(self,timestamp):
         """
@@ -28,127 +43,217 @@ class YouTubeTranscriptExtractor:
             return 0
 
     def process_input_json(self) -> Optional[List[Dict]]:
-        """Process input JSON and extract transcripts"""
+        """
+        Process input JSON and extract transcripts
+
+        Videos are read, processed and written one at a time, so in JSONL
+        format memory stays constant and every finished video is on disk.
+
+        Returns:
+            Optional[List[Dict]]: Channel transcript data in "json" format, None in "jsonl" format
+                or if the input file is missing
+        """
         # Check if input file exists
-        if not os.path.exists(self.config.EXTRACTED_VIDEOS_FILE):
-            self.logger.error(f"Input file not found: {self.config.EXTRACTED_VIDEOS_FILE}")
+        if not stage_file_exists(self.config.EXTRACTED_VIDEOS_FILE):
+            self.logger.error(f"Input file not found: {stage_path(self.config.EXTRACTED_VIDEOS_FILE)}")
             return None
         
-        # Read input JSON
-        with open(self.config.EXTRACTED_VIDEOS_FILE, 'r') as f:
-            input_data = json.load(f)
+        records = iter_stage_records(self.config.EXTRACTED_VIDEOS_FILE)
+
+        def process_record(record):
+            _, video = record
+            return self.process_video(video) if video is not None else None
+
+        # Videos of all channels are processed together, in input order
+        if self.config.TRANSCRIPT_WORKERS > 1:
+            results = imap_ordered(
+                process_record,
+                records,
+                max_workers=self.config.TRANSCRIPT_WORKERS,
+                timeout=self.config.TRANSCRIPT_TIMEOUT,
+                default=None,
+                name="transcript"
+            )
+        else:
+            results = ((record, process_record(record)) for record in records)
+
+        with StageWriter(self.config.VIDEO_TRANSCRIPT_FILE) as writer:
+            for (channel_name, _), transcript in results:
+                writer.write(channel_name, transcript)
         
-        # Output data structure
-        output_data = []
+        self.logger.info(f"Saved output to {writer.path}")
         
-        for channel_data in input_data:
-            channel_name = channel_data.get('channel_name', '')
-            channel_videos = []
-            
-            for video in channel_data.get('videos', []):
-                # Extract title and upload time
-                title = video.get('title', '')
-                upload_time = video.get('upload_time', '')
-                video_id = video.get('id', '')
-                
-                video_url = f"https://www.youtube.com/watch?v={video_id}"
-                
-                try:
-                    # Extract transcript using video ID
-                    transcript_data = self._extract_transcript(video_url)
-                    if transcript_data:
-                        channel_videos.append({
-                            'title': title,
-                            'upload_time': upload_time,
-                            "transcript_data":transcript_data
-                        })
-                except Exception as e:
-                    self.logger.error(f"Error processing video {title}: {e}")
-            
-            # Add channel data to output if it matches input structure
-            output_data.append({
-                'channel_name': channel_name,
-                'videos': channel_videos
-            })
-        
-        with open(self.config.VIDEO_TRANSCRIPT_FILE ,'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
+        return writer.channels
+
+    def process_video(self, video: Dict) -> Optional[Dict]:
+        """
+        Extract the transcript of one video from the channel scan
+
+        Args:
+            video (Dict): Video entry with id, title and upload_time
+
+        Returns:
+            Optional[Dict]: Video with transcript_data, or None if no transcript could be extracted
+        """
+        # Extract title and upload time
+        title = video.get('title', '')
+        upload_time = video.get('upload_time', '')
+        video_id = video.get('id', '')
         
-        self.logger.info(f"Saved output to {self.config.VIDEO_TRANSCRIPT_FILE}")
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
         
-        return output_data
+        try:
+            # Reuse the transcript of an earlier run, otherwise extract it using video ID
+            transcript_data = self.index.payload(video_id, STAGE_TRANSCRIBED) if self.index else None
+            if transcript_data is None:
+                transcript_data = self._extract_transcript(video_url, video)
+                if transcript_data and self.index:
+                    self.index.mark_complete(video_id, STAGE_TRANSCRIBED, transcript_data)
 
-    def _extract_transcript(self, video_url: str) -> Optional[Dict]:
+            if transcript_data:
+                return {
+                    'id': video_id,
+                    'title': title,
+                    'upload_time': upload_time,
+                    "transcript_data":transcript_data
+                }
+        except Exception as e:
+            self.logger.error(f"Error processing video {title}: {e}")
 
-        """Extract transcript for a given video URL"""
-        video_id = video_url.split('=')[-1]
-        
+        return None
+
+    @timed("transcript.extract")
+    def _extract_transcript(self, video_url: str, video: Optional[Dict] = None) -> Optional[Dict]:
+
+        """
+        Extract transcript for a given video URL
+
+        Chapters and the caption URL recorded by the channel scan are used when
+        present, so the video page is not resolved again. Otherwise one
+        extract_info call provides both. Captions are read straight into memory.
+
+        Args:
+            video_url (str): Watch URL of the video
+            video (Optional[Dict]): Video entry from the channel scan
+
+        Returns:
+            Optional[Dict]: Transcript text per chapter title
+        """
+        video = video or {}
         ydl_opts = {
+            'quiet': True,
             'skip_download': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': self.config.SUBTITLE_LANGS,
-            'outtmpl':os.path.join(self.config.VTT_FILES, f'{video_id}.%(ext)s')
+            'socket_timeout': self.config.TRANSCRIPT_SOCKET_TIMEOUT,
         }
         
+        with self.ydl_factory(ydl_opts) as ydl:
+            vtt_text = None
+            chapters = video.get('chapters') or []
+
+            if self.config.REUSE_SCAN_METADATA and 'subtitle_url' in video:
+                if not video['subtitle_url']:
+                    self.logger.info(f"No subtitles found for {video_url}")
+                    return
+                vtt_text = self._fetch_subtitles(ydl, video['subtitle_url'])
+
+            if vtt_text is None:
+                try:
+                    with timed("youtube.extract_info"):
+                        info_dict = ydl.extract_info(video_url, download=False)
+                except Exception as e:
+                    self.logger.error(f"Download error for {video_url}: {e}")
+                    return
+
+                metadata = caption_metadata(info_dict or {})
+                chapters = metadata['chapters']
+                if metadata['subtitle_url']:
+                    vtt_text = self._fetch_subtitles(ydl, metadata['subtitle_url'])
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info_dict = ydl.extract_info(video_url, download=False)
-                ydl.download([video_url])
-            except Exception as e:
-                print(f"Download error: {e}")
-                return
-        
-        vtt_file = os.path.join(self.config.VTT_FILES, f'{video_id}.en.vtt')
-        
-        if not os.path.exists(vtt_file):
+        if not vtt_text:
             print("No subtitles found.")
             return
         
         try:
-            # Read all captions with timestamps
-            captions = webvtt.read(vtt_file)
-            
-            # Get chapters 
-            chapters = info_dict.get('chapters', [])
-            
-            # Initialize chapter transcripts dictionary
-            chapter_transcript = {}
-            
-            if chapters:
-                # Process with chapters
-                for i, chapter in enumerate(chapters):
-                    start_time = chapter.get('start_time', 0)
-                    # Get next chapter's start time or use video duration if last chapter
-                    end_time = chapters[i+1].get('start_time', float('inf')) if i+1 < len(chapters) else float('inf')
-                    
-                    # Filter captions for this chapter
-                    chapter_captions = [
-                        caption.text.replace('\n', ' ').strip() 
-                        for caption in captions 
-                        if start_time <= self.convert_timestamp(caption.start) < end_time
-                    ]
-                   
-                    # Remove duplicates while preserving order
-                    unique_captions = list(OrderedDict.fromkeys(filter(bool, chapter_captions)))
+            with timed("vtt.parse"):
+                if self.config.VTT_PARSER == "fast":
+                    # Rolling auto-caption repeats are collapsed while parsing
+                    caption_starts, caption_texts = parse_vtt(vtt_text)
+                else:
+                    import webvtt
+
+                    # Read all captions with timestamps
+                    captions = webvtt.from_string(vtt_text)
                     
-                    chapter_transcript[chapter['title']] = ' '.join(unique_captions)
-            else:
-                # If no chapters, use entire transcript
-                full_captions = [
-                    caption.text.replace('\n', ' ').strip() 
-                    for caption in captions
-                ]
-                # Remove duplicates while preserving order
-                unique_captions = list(OrderedDict.fromkeys(filter(bool, full_captions)))
-                
-                chapter_transcript['Full Video'] = ' '.join(unique_captions)
-            return chapter_transcript
+                    # Parse every caption timestamp once
+                    caption_starts = array('d', (self.convert_timestamp(caption.start) for caption in captions))
+                    caption_texts = [caption.text.replace('\n', ' ').strip() for caption in captions]
+
+            return self._bucket_by_chapter(
+                caption_starts, caption_texts, chapters, deduplicate=self.config.VTT_PARSER != "fast"
+            )
 
         except Exception as e:
             self.logger.error(f"Transcript extraction error for {video_url}: {e}")
             return None
 
+    @timed("youtube.subtitle_download")
+    def _fetch_subtitles(self, ydl, subtitle_url: str) -> Optional[str]:
+        """Download a caption file into memory, None if it cannot be fetched (e.g. an expired URL)"""
+        try:
+            return ydl.urlopen(subtitle_url).read().decode('utf-8')
+        except Exception as e:
+            self.logger.warning(f"Could not fetch subtitles: {e}")
+            return None
+
+    def _bucket_by_chapter(
+        self,
+        starts: Sequence[float],
+        texts: List[str],
+        chapters: List[Dict],
+        deduplicate: bool = True
+    ) -> Dict[str, str]:
+        """
+        Assign captions to chapters in a single sweep
+
+        Args:
+            starts (Sequence[float]): Caption start times in seconds
+            texts (List[str]): Caption texts, parallel to starts
+            chapters (List[Dict]): yt-dlp chapters with title and start_time, in video order
+            deduplicate (bool): Drop captions whose exact text already occurred in the chapter
+
+        Returns:
+            Dict[str, str]: Transcript text per chapter title ('Full Video' without chapters)
+        """
+        # Initialize chapter transcripts dictionary
+        chapter_transcript = {}
+
+        if not chapters:
+            # If no chapters, use entire transcript
+            chapter_transcript['Full Video'] = self._join_captions(texts, deduplicate)
+            return chapter_transcript
+
+        # A caption belongs to the last chapter starting at or before it;
+        # captions before the first chapter are dropped
+        chapter_starts = [chapter.get('start_time', 0) for chapter in chapters]
+        chapter_captions = [[] for _ in chapters]
+
+        for start, text in zip(starts, texts):
+            index = bisect_right(chapter_starts, start) - 1
+            if index >= 0:
+                chapter_captions[index].append(text)
+
+        for chapter, captions in zip(chapters, chapter_captions):
+            chapter_transcript[chapter['title']] = self._join_captions(captions, deduplicate)
+
+        return chapter_transcript
+
+    @staticmethod
+    def _join_captions(captions: List[str], deduplicate: bool) -> str:
+        if deduplicate:
+            # Remove duplicates while preserving order
+            captions = OrderedDict.fromkeys(filter(bool, captions))
+        return ' '.join(captions)
+
 def TranscriptExtractor():
     """Main entry point for the script"""
     extractor = YouTubeTranscriptExtractor()
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Any, List, Optional
+import os, json, sqlite3, threading, pytz, config
+
+
+# Pipeline stages recorded per video, in pipeline order
+STAGE_EXTRACTED = 'extracted'
+STAGE_TRANSCRIBED = 'transcribed'
+STAGE_SUMMARIZED = 'summarized'
+STAGE_SENT = 'sent'
+
+
+class VideoIndex:
+    """
+    On-disk record of the pipeline stages each video has finished
+
+    Stage results (transcripts, summaries) are stored alongside the stage so a
+    later run can pick up an incomplete video where the previous run left it,
+    even though IO_FILES is wiped at the start of every run.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (and create if needed) the index database
+
+        Args:
+            path (Optional[str]): SQLite file, defaults to config.VIDEO_INDEX_FILE
+        """
+        self.config = config
+        self.logger = self.config.LOGGER
+        self.path = path or self.config.VIDEO_INDEX_FILE
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Stages may run on worker threads; every access goes through the lock.
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS video_stages (
+                    video_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    payload TEXT,
+                    completed_at TEXT NOT NULL,
+                    PRIMARY KEY (video_id, stage)
+                )"""
+            )
+
+    def is_complete(self, video_id: str, stage: str) -> bool:
+        """Whether the video has finished the given stage"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM video_stages WHERE video_id = ? AND stage = ?",
+                (video_id, stage)
+            ).fetchone()
+        return row is not None
+
+    def payload(self, video_id: str, stage: str) -> Optional[Any]:
+        """
+        Result stored when the video finished the given stage
+
+        Returns:
+            Optional[Any]: Decoded payload, or None if the stage is incomplete or stored no result
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM video_stages WHERE video_id = ? AND stage = ?",
+                (video_id, stage)
+            ).fetchone()
+
+        if not row or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def completed_stages(self, video_id: str) -> List[str]:
+        """Stages the video has finished"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT stage FROM video_stages WHERE video_id = ?",
+                (video_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_complete(self, video_id: str, stage: str, payload: Any = None) -> None:
+        """
+        Record that the video finished a stage
+
+        Args:
+            video_id (str): YouTube video id
+            stage (str): One of the STAGE_* constants
+            payload (Any): JSON-serialisable stage result to keep for later runs
+        """
+        encoded = json.dumps(payload, ensure_ascii=False) if payload is not None else None
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO video_stages (video_id, stage, payload, completed_at) VALUES (?, ?, ?, ?)",
+                (video_id, stage, encoded, datetime.now(pytz.utc).isoformat())
+            )
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+
+def open_video_index() -> Optional[VideoIndex]:
+    """Open the shared video index, or return None when SKIP_SEEN_VIDEOS is disabled"""
+    if not config.SKIP_SEEN_VIDEOS:
+        return None
+
+    try:
+        return VideoIndex()
+    except sqlite3.Error as e:
+        config.LOGGER.error(f"Could not open video index {config.VIDEO_INDEX_FILE}: {e}")
+        return None
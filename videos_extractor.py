@@ -1,14 +1,27 @@
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Optional
 from datetime import datetime, timedelta
-import os, json, pytz, yt_dlp, config
+import os, pytz, yt_dlp, config
+from concurrency import imap_ordered
+from stage_io import StageWriter
+from video_index import STAGE_EXTRACTED, STAGE_SENT, open_video_index
+from subtitles import caption_metadata
+from metrics import timed
 
 
 
 class YouTubeChannelExtractor:
-    def __init__(self):
-        """Initialize the YouTube channel extractor with config"""
+    def __init__(self, ydl_factory: Optional[Callable] = None):
+        """
+        Initialize the YouTube channel extractor with config
+
+        Args:
+            ydl_factory (Optional[Callable]): Builds a YoutubeDL-like object from an options
+                dict. Defaults to yt_dlp.YoutubeDL; benchmarks pass a local fake.
+        """
         self.config = config
         self.logger = self.config.LOGGER
+        self.ydl_factory = ydl_factory or yt_dlp.YoutubeDL
+        self.index = open_video_index()
 
 
     def _parse_timestamp(self, timestamp: Optional[str]) -> Optional[datetime]:
@@ -28,6 +41,7 @@ class YouTubeChannelExtractor:
             self.logger.warning(f"Could not parse timestamp {timestamp}: {e}")
             return None
 
+    @timed("youtube.channel_scan")
     def get_videos_within_timeframe(self, channel_url: str) -> List[Dict]:
         """Fetch videos uploaded within specified time range"""
         # Merge default and custom yt-dlp options
@@ -35,7 +49,8 @@ class YouTubeChannelExtractor:
             'quiet': True,
             'extract_flat': False,
             'playlistend': self.config.MAX_VIDEOS,
-            'ignoreerrors': True
+            'ignoreerrors': True,
+            'socket_timeout': self.config.CHANNEL_SCAN_SOCKET_TIMEOUT
         }
         
         videos_in_timeframe = []
@@ -46,79 +61,226 @@ class YouTubeChannelExtractor:
             if not channel_url.endswith('/videos'):
                 channel_url += '/videos'
             video_fields=["id","title","upload_time"]
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(channel_url, download=False)
-                
-                entries = info.get('entries', []) or info.get('items', [])
+
+            if self.config.FLAT_PREFILTER:
+                entries = self._prefiltered_entries(channel_url, ydl_opts, time_ago)
+            else:
+                with self.ydl_factory(ydl_opts) as ydl:
+                    info = ydl.extract_info(channel_url, download=False)
+                    entries = info.get('entries', []) or info.get('items', [])
        
-                for entry in entries:
-
-                    try:
-                        timestamp = (
-                            entry.get('timestamp') or 
-                            entry.get('upload_date') or 
-                            entry.get('published_at')
-                        )
-                        
-                        video_datetime = self._parse_timestamp(timestamp)
-                        
-                        if not video_datetime:
-                            continue
-                        
-                        if time_ago <= video_datetime <= current_time:
-                            video_info = {
-                                field: entry.get(field) 
-                                for field in video_fields 
-                                if field in entry
-                            }
-                            video_info['upload_time'] = video_datetime.isoformat()
-                            
-                            videos_in_timeframe.append(video_info)
+            for entry in entries:
+
+                try:
+                    video_datetime = self._entry_datetime(entry)
+                    
+                    if not video_datetime:
+                        continue
                     
-                    except Exception as video_error:
-                        self.logger.error(f"Error processing a video: {video_error}")
+                    if time_ago <= video_datetime <= current_time:
+                        video_info = {
+                            field: entry.get(field) 
+                            for field in video_fields 
+                            if field in entry
+                        }
+                        video_info['upload_time'] = video_datetime.isoformat()
+
+                        # Hand chapters and the caption URL to the transcript stage so
+                        # it does not have to resolve the video page again
+                        if self.config.REUSE_SCAN_METADATA and entry.get('automatic_captions') is not None:
+                            video_info.update(caption_metadata(entry))
+                        
+                        videos_in_timeframe.append(video_info)
+                
+                except Exception as video_error:
+                    self.logger.error(f"Error processing a video: {video_error}")
         
         except Exception as e:
             self.logger.error(f"Error fetching videos from {channel_url}: {e}")
         
         return videos_in_timeframe
 
-    def extract_channel_videos(self) -> List[Dict]:
-        """Extract videos for multiple channels"""
-        # Use channels from config if not provided
-        channels_to_process=[]
-        
+    def _entry_datetime(self, entry: Optional[Dict]) -> Optional[datetime]:
+        """Upload time of a playlist entry, if it carries one"""
+        if not entry:
+            return None
+
+        timestamp = (
+            entry.get('timestamp') or 
+            entry.get('upload_date') or 
+            entry.get('published_at')
+        )
+        return self._parse_timestamp(timestamp)
+
+    def _prefiltered_entries(self, channel_url: str, ydl_opts: Dict, time_ago: datetime) -> List[Dict]:
+        """
+        Resolve full metadata only for videos that can fall inside the time window
+
+        A cheap flat listing of the channel's /videos tab is read first. YouTube
+        only shows relative upload times there ("3 hours ago"), so yt-dlp's
+        approximate dates are compared against the window widened by
+        FLAT_PREFILTER_SLACK hours. The tab is newest-first, so the listing stops
+        at the first entry older than that, and full extraction stops at the
+        first video whose exact upload time is outside the window.
+
+        Args:
+            channel_url (str): URL of the channel's /videos tab
+            ydl_opts (Dict): Base yt-dlp options
+            time_ago (datetime): Start of the time window
+
+        Returns:
+            List[Dict]: Fully extracted info dicts of the candidate videos, newest first
+        """
+        flat_opts = {
+            **ydl_opts,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+            'extractor_args': {'youtubetab': {'approximate_date': ['']}}
+        }
+        cutoff = time_ago - timedelta(hours=self.config.FLAT_PREFILTER_SLACK)
+
+        candidates = []
+        with self.ydl_factory(flat_opts) as ydl:
+            listing = ydl.extract_info(channel_url, download=False) or {}
+
+            for entry in listing.get('entries') or []:
+                if not entry:
+                    continue
+
+                approximate_datetime = self._entry_datetime(entry)
+                if approximate_datetime and approximate_datetime < cutoff:
+                    break
+
+                candidates.append(entry)
+
+        full_entries = []
+        with self.ydl_factory(ydl_opts) as ydl:
+            for entry in candidates:
+                video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
+                info = ydl.extract_info(video_url, download=False)
+                if not info:
+                    continue
+
+                full_entries.append(info)
+
+                video_datetime = self._entry_datetime(info)
+                if video_datetime and video_datetime < time_ago:
+                    break
+
+        self.logger.debug(
+            f"Flat pre-filter kept {len(candidates)} candidate(s), fully extracted {len(full_entries)} for {channel_url}"
+        )
+        return full_entries
+
+    def _channel_url(self, channel: str) -> str:
+        """Build the channel URL for an entry of channels.txt"""
+        return channel if channel.startswith('http') else f"https://www.youtube.com/@{channel}"
+
+    def scan_channel(self, channel: str) -> List[Dict]:
+        """Fetch recent videos for a single channel, leaving out videos that were already delivered"""
+        videos = self.get_videos_within_timeframe(self._channel_url(channel))
+        print(f"Videos have been processed for channel {channel} . Number of recent videos {len(videos)}")
+        return self._pending_videos(videos)
+
+    def read_channels(self) -> Optional[List[str]]:
+        """Channels listed in channels.txt, or None if the file does not exist"""
         try:
             with open('channels.txt', 'r') as file:
-                channels_to_process = [line.strip() for line in file if line.strip()]
+                return [line.strip() for line in file if line.strip()]
         except FileNotFoundError:
             self.logger.error("No channels specified and channels.txt not found.")
-            return []
-        
-        all_channel_videos = []
-        
-        for channel in channels_to_process:
-            channel_url = channel if channel.startswith('http') else f"https://www.youtube.com/@{channel}"
-            
-            videos = self.get_videos_within_timeframe(channel_url)
-            print(f"Videos have been processed for channel {channel} . Number of recent videos {len(videos)}")
-            all_channel_videos.append({
+            return None
+
+    def extract_channel_videos(
+        self,
+        channels: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Extract videos for multiple channels
+
+        Args:
+            channels (Optional[List[str]]): Channels to scan, read from channels.txt if not provided
+            max_workers (Optional[int]): Number of channels scanned concurrently,
+                defaults to config.CHANNEL_SCAN_WORKERS. 1 scans channels one at a time.
+
+        Returns:
+            List[Dict]: Channel video data, in the same order as the channels
+        """
+        return list(self.iter_channel_videos(channels, max_workers))
+
+    def iter_channel_videos(
+        self,
+        channels: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily extract videos for multiple channels, yielding each channel in order as soon as it is scanned
+
+        Args:
+            channels (Optional[List[str]]): Channels to scan, read from channels.txt if not provided
+            max_workers (Optional[int]): Number of channels scanned concurrently,
+                defaults to config.CHANNEL_SCAN_WORKERS. 1 scans channels one at a time.
+
+        Yields:
+            Dict: Channel video data
+        """
+        # Use channels from config if not provided
+        channels_to_process = channels
+
+        if channels_to_process is None:
+            channels_to_process = self.read_channels()
+            if channels_to_process is None:
+                return
+
+        if max_workers is None:
+            max_workers = self.config.CHANNEL_SCAN_WORKERS
+
+        if max_workers > 1:
+            channel_videos = imap_ordered(
+                self.scan_channel,
+                channels_to_process,
+                max_workers=max_workers,
+                timeout=self.config.CHANNEL_SCAN_TIMEOUT,
+                default=[],
+                name="channel-scan"
+            )
+        else:
+            channel_videos = ((channel, self.scan_channel(channel)) for channel in channels_to_process)
+
+        for channel, videos in channel_videos:
+            yield {
                 'channel_name': channel,
                 'videos': videos
-            })
-        
-        return all_channel_videos
+            }
 
-    def save_to_json(self, data: List[Dict], filename: str = None):
-        """Save extracted data to JSON file"""
-        
-        filepath =self.config.EXTRACTED_VIDEOS_FILE
+    def _pending_videos(self, videos: List[Dict]) -> List[Dict]:
+        """Drop videos that an earlier run already delivered and record the rest as extracted"""
+        if not self.index:
+            return videos
+
+        pending = []
+        for video in videos:
+            video_id = video.get('id')
+            if video_id and self.index.is_complete(video_id, STAGE_SENT):
+                self.logger.info(f"Skipping already processed video {video_id}")
+                continue
+
+            if video_id:
+                self.index.mark_complete(video_id, STAGE_EXTRACTED)
+            pending.append(video)
+
+        return pending
+
+    def save_to_json(self, data: Iterable[Dict], filename: str = None):
+        """Save extracted data to the stage file, channel by channel"""
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as file:
-                json.dump(data, file, indent=4, ensure_ascii=False)
+            with StageWriter(self.config.EXTRACTED_VIDEOS_FILE) as writer:
+                for channel in data:
+                    writer.write_channels([channel])
             
-            self.logger.info(f"Saved videos to {filepath}")
+            self.logger.info(f"Saved videos to {writer.path}")
         except Exception as e:
             self.logger.error(f"Error saving to JSON: {e}")
 
@@ -127,14 +289,12 @@ def VideoExtractor():
     extractor = YouTubeChannelExtractor()
     
     try:
-        # Extract videos
-        extracted_data = extractor.extract_channel_videos()
-        
-        # Save to JSON
-        extractor.save_to_json(extracted_data)
+        # Extract videos and save them as each channel is scanned
+        extractor.save_to_json(extractor.iter_channel_videos())
     
     except Exception as e:
-        self.logger.error(f"Unexpected error: {e}")
+        extractor.logger.error(f"Unexpected error: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    config.setup_logging()
+    VideoExtractor()
\ No newline at end of file
@@ -0,0 +1,92 @@
+from array import array
+from html import unescape
+from typing import Iterable, List, Tuple
+import re
+
+
+# Inline markup of auto-generated captions: <c>, </c>, <c.colorE5E5E5>, <00:00:01.234>
+INLINE_TAGS = re.compile(r'<[^>]*>')
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """Seconds of a WebVTT timestamp such as '01:02:03.456' or '02:03.456'"""
+    seconds = 0.0
+    for part in timestamp.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def overlap_length(previous: List[str], words: List[str]) -> int:
+    """Length of the longest suffix of previous that is also a prefix of words"""
+    for length in range(min(len(previous), len(words)), 0, -1):
+        if previous[-length:] == words[:length]:
+            return length
+    return 0
+
+
+def parse_vtt_lines(lines: Iterable[str], collapse: bool = True) -> Tuple[array, List[str]]:
+    """
+    Parse WebVTT captions line by line into start times and texts
+
+    Inline timing and style tags are stripped. With collapse, the rolling
+    window of YouTube auto-captions is undone: each cue repeats the tail of
+    the previous one, so only the words after the longest overlap with the
+    previous cue are kept, and cues that add nothing are dropped.
+
+    Args:
+        lines (Iterable[str]): Lines of the VTT file, e.g. an open file
+        collapse (bool): Remove the text a cue repeats from the previous cue
+
+    Returns:
+        Tuple[array, List[str]]: Cue start times in seconds (array of doubles)
+            and the parallel cue texts
+    """
+    starts = array('d')
+    texts: List[str] = []
+    previous: List[str] = []
+    cue_start = None
+    cue_lines: List[str] = []
+
+    def finish_cue():
+        nonlocal previous
+        text = INLINE_TAGS.sub('', ' '.join(cue_lines))
+        if '&' in text:
+            text = unescape(text)
+        words = text.split()
+
+        if collapse:
+            new_words = words[overlap_length(previous, words):]
+            previous = words
+        else:
+            new_words = words
+
+        if new_words:
+            starts.append(cue_start)
+            texts.append(' '.join(new_words))
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        if cue_start is None:
+            # Header, NOTE/STYLE blocks and cue identifiers are skipped
+            if '-->' in line:
+                cue_start = parse_timestamp(line.split('-->', 1)[0].strip())
+                cue_lines = []
+            continue
+
+        # Only an empty line ends a cue; YouTube puts lines of a single space inside cues
+        if line:
+            cue_lines.append(line)
+        else:
+            finish_cue()
+            cue_start = None
+
+    if cue_start is not None:
+        finish_cue()
+
+    return starts, texts
+
+
+def parse_vtt(text: str, collapse: bool = True) -> Tuple[array, List[str]]:
+    """Parse WebVTT captions held in a string, see parse_vtt_lines"""
+    return parse_vtt_lines(text.splitlines(), collapse)